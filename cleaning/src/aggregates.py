@@ -0,0 +1,106 @@
+"""
+Per-block aggregate functions (stages) used by the cleaning scripts, and the reducers that
+merge their per-block results. Stages run inside checkpoint.run_stages.
+"""
+import numpy as np
+import pandas as pd
+
+from checkpoint import run_stages
+from context import COUNTINGS
+from ingest import DATA_PATH
+
+# Renamed when the stage gained the primary/fractional columns, so older checkpoints are not reused
+CATEGORY_MONTH = 'category_month_weighted'
+# Count column of each counting mode (context.COUNTINGS)
+COUNT_COLUMNS = dict(zip(COUNTINGS, ['count', 'count_primary', 'count_fractional']))
+MAJOR_CATEGORIES = ['Computer Science', 'Economics', 'Electrical Engineering and Systems Science', 'Mathematics',
+                    'Physics', 'Quantitative Biology', 'Quantitative Finance', 'Statistics', 'Other']
+
+
+def map_major_category(cat):
+    if isinstance(cat, str):
+        if cat.startswith('cs'): return 'Computer Science'
+        elif cat.startswith('econ'): return 'Economics'
+        elif cat.startswith('eess'): return 'Electrical Engineering and Systems Science'
+        elif cat.startswith('math'): return 'Mathematics'
+        elif cat.startswith('physics'): return 'Physics'
+        elif cat.startswith('q-bio'): return 'Quantitative Biology'
+        elif cat.startswith('q-fin'): return 'Quantitative Finance'
+        elif cat.startswith('stat'): return 'Statistics'
+        else: return 'Other'
+    return 'Other'
+
+
+def expand_categories(pairs):
+    """
+    Expand (month, categories string, count) rows into (month, categories_list) counts under
+    every counting mode: count (full: a paper counts once in every category it lists),
+    count_primary (only in the first listed category) and count_fractional (1/n in each of
+    its n categories). Rows with missing keys are kept, as NaN.
+    """
+    categories = pairs['categories'].str.split()
+    n_categories = categories.str.len().fillna(0).to_numpy()
+    expanded = pd.DataFrame({
+        'month': pairs['month'].to_numpy(),
+        'categories_list': categories.to_numpy(),
+        'count': pairs['count'].to_numpy(),
+        'count_fractional': pairs['count'].to_numpy() / np.maximum(n_categories, 1),
+    }).explode('categories_list')
+    expanded.insert(3, 'count_primary', np.where(expanded.index.duplicated(), 0, expanded['count']))
+    columns = list(COUNT_COLUMNS.values())
+    return expanded.groupby(['month', 'categories_list'], dropna=False)[columns].sum().reset_index()
+
+
+def category_month_partial(pdf):
+    """Count (month, category) pairs in one block under every counting mode (see expand_categories)."""
+    pairs = pd.DataFrame({'month': pdf['update_date'].str[:7], 'categories': pdf['categories']})
+    # Count each distinct categories string once per month before splitting it
+    return expand_categories(pairs.groupby(['month', 'categories'], dropna=False).size().reset_index(name='count'))
+
+
+def merge_counts(partials, keys):
+    """Sum the count columns of per-block tables into one table keyed by keys (rows with missing keys are dropped)."""
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(keys)[[c for c in combined.columns if c not in keys]].sum().reset_index()
+
+
+def counting_table(counts, keys, counting):
+    """The keys and the counting mode's count column of counts, as a keys + count table."""
+    table = counts[keys + [COUNT_COLUMNS[counting]]].rename(columns={COUNT_COLUMNS[counting]: 'count'})
+    if counting == 'fractional':
+        table['count'] = table['count'].round(4)
+    return table
+
+
+def category_month_counts(path=DATA_PATH, engine='dask', collapse_duplicates=False, stage_runner=run_stages):
+    """
+    Category-month count table of the snapshot, computed by the checkpointed Dask block
+    engine (through stage_runner, run_stages or a Context's) or by the memory-mapped scanner
+    (mmap_scan.py). With collapse_duplicates, each near-duplicate cluster found by
+    extract_duplicate_clusters.py in the same input counts as one paper.
+    """
+    if engine == 'mmap':
+        from mmap_scan import scan_category_months
+        counts = scan_category_months(path)
+    else:
+        partials = stage_runner({CATEGORY_MONTH: category_month_partial}, path)
+        counts = merge_counts(partials[CATEGORY_MONTH], ['month', 'categories_list'])
+    if collapse_duplicates:
+        from minhash import collapse_duplicates as collapse, load_clusters
+        counts = collapse(counts, load_clusters(path))
+    return counts
+
+
+def paper_authors(pdf):
+    """One row per (paper position, author key); the key is the lowercased 'last, first' name."""
+    authors = pd.Series(pdf['authors_parsed'].to_numpy(), index=range(len(pdf))).explode().dropna()
+    key = (authors.str[0].fillna('') + ', ' + authors.str[1].fillna('')).str.strip().str.lower()
+    return key[key != ',']
+
+
+def paper_categories(pdf):
+    """One row per (paper position, month, category)."""
+    return pd.DataFrame({
+        'month': pdf['update_date'].str[:7].to_numpy(),
+        'category': pdf['categories'].str.split().to_numpy()
+    }).explode('category').dropna()
@@ -0,0 +1,54 @@
+"""
+Archives the snapshot's category-month counts (as in cleaning/asset/category_month_counts.csv)
+into the snapshot history store (cleaning/history/) so later releases of the arXiv snapshot can be
+compared against it (see snapshot_store.py).
+
+The raw counts are archived whatever the run's options: full counting, without
+--collapse-duplicates, so every release in the store counts the same way. --sample runs are not
+archived.
+
+The release is keyed by --snapshot-date, defaulting to the modification date of the snapshot file
+(of its newest shard, if the input is sharded).
+"""
+import datetime
+import os
+import sys
+
+from context import Context
+
+def add_arguments(parser):
+    parser.add_argument('--snapshot-date', help="release key, e.g. 2024-06-01 (default: snapshot file date)")
+
+def block_stages(context):
+    return context.category_month_stages()
+
+def default_snapshot_date(data_path):
+    from ingest import shard_paths
+    try:
+        mtime = max(os.path.getmtime(path) for path in shard_paths(data_path))
+    except FileNotFoundError:
+        return datetime.date.today().isoformat()
+    return datetime.date.fromtimestamp(mtime).isoformat()
+
+def main(context):
+    from aggregates import counting_table
+    from snapshot_store import STORE_DIR, add_snapshot
+
+    if context.option('sample'):
+        print("Skipping archive: --sample estimates are not archived")
+        return
+    snapshot_date = context.option('snapshot_date') or default_snapshot_date(context.data_path)
+    print(f"Archiving the category-month counts of {context.data_path} as snapshot {snapshot_date} ...")
+    try:
+        counts = context.category_month_counts(context.data_path, collapse_duplicates=False)
+        counts = counting_table(counts, ['month', 'categories_list'], 'full')
+        if add_snapshot(counts, snapshot_date):
+            print(f"Saved to {STORE_DIR}/snapshots/{snapshot_date}.npz")
+        else:
+            print(f"Snapshot {snapshot_date} is already archived, nothing to do")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
@@ -0,0 +1,31 @@
+"""
+Builds the byte-offset record index of the snapshot (see record_index.py) and saves it to cleaning/index/
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import sys
+
+from context import Context
+
+def main(context):
+    from ingest import compression_of, shard_paths
+    from record_index import INDEX_DIR, build_record_index
+
+    data_path = context.data_path
+    if compression_of(data_path):
+        print(f"Skipping record index: {data_path} is compressed, byte offsets need the uncompressed snapshot")
+        return
+    if shard_paths(data_path) != [data_path]:
+        print(f"Skipping record index: {data_path} is sharded, byte offsets need a single snapshot file")
+        return
+    print(f"Indexing record offsets in {data_path} ...")
+    try:
+        n_records = build_record_index(data_path, INDEX_DIR)
+        print(f"Saved index of {n_records} records to {INDEX_DIR}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
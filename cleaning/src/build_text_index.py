@@ -0,0 +1,32 @@
+"""
+Builds the inverted full-text index over titles and abstracts (see text_index.py) and saves it to cleaning/index/
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import sys
+
+from context import Context
+
+TEXT_INDEX = 'text_index'
+
+def block_stages(context):
+    from text_index import index_block
+    return {TEXT_INDEX: index_block}
+
+def main(context):
+    from text_index import INDEX_DIR, write_index
+
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Indexing titles and abstracts per block (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)[TEXT_INDEX]
+        print("Merging block segments...")
+        n_terms, n_docs = write_index(part_paths, INDEX_DIR)
+        print(f"Saved index of {n_terms} terms over {n_docs} papers to {INDEX_DIR}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
@@ -0,0 +1,179 @@
+"""
+Checkpointed partition processing for the cleaning scripts.
+
+The snapshot is processed block by block (see ingest.py). Each block is parsed once and
+every requested stage function is applied to it; the per-block results are pickled to a
+scratch directory as soon as they are computed. A rerun after a crash (OOM, killed job,
+...) only processes the blocks that have no checkpoint yet, and scripts that share a stage
+reuse each other's checkpoints.
+
+Checkpoints are keyed by a fingerprint of the input file (path, size, mtime) and the block
+size, so a new snapshot never picks up stale results, and by a version of each stage: a hash
+of the source of the module defining the stage function, so editing a stage or its module's
+constants starts it afresh. (Helpers a stage imports from other modules are not covered;
+rename the stage when changing them, as CATEGORY_MONTH was.) Checkpoints that no block can
+reference any more -- run directories of inputs that changed or were deleted, and other
+versions of the stages being run -- are removed at the start of each run. A sharded input (a directory or glob,
+see ingest.shard_paths) is fingerprinted shard by shard and the blocks of all shards are
+scheduled together, so adding a shard to a harvest only costs processing that shard; the
+per-block results of all shards are returned in shard order, to be merged as usual.
+"""
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+
+import dask
+import pandas as pd
+from tqdm import tqdm
+
+from ingest import BLOCKSIZE, DATA_PATH, iter_blocks, parse_block, shard_paths
+
+SCRATCH_DIR = 'cleaning/scratch'
+SOURCE_FILE = 'source.json'
+RUN_DIR_PATTERN = re.compile(r'[0-9a-f]{16}')
+STAGE_DIR_PATTERN = re.compile(r'(.+)-[0-9a-f]{8}')
+
+
+def source_fingerprint(path, blocksize=BLOCKSIZE):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{blocksize}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def stage_version(func):
+    """Hash of the source of the module defining func, so of the stage's code and its module's constants."""
+    try:
+        source = inspect.getsource(inspect.getmodule(func))
+    except (OSError, TypeError):
+        source = func.__qualname__
+    return hashlib.sha1(source.encode()).hexdigest()[:8]
+
+
+def _part_path(run_dir, stage_dir, index):
+    return os.path.join(run_dir, stage_dir, f'part-{index:05d}.pkl')
+
+
+def _record_source(run_dir, shard, blocksize):
+    """Write the input run_dir was fingerprinted from, so prune can tell when it is gone."""
+    path = os.path.join(run_dir, SOURCE_FILE)
+    if os.path.exists(path):
+        return
+    stat = os.stat(shard)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'path': os.path.abspath(shard), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'blocksize': blocksize}, f)
+    os.replace(tmp_path, path)
+
+
+def _is_stale(run_dir):
+    """Whether no input maps to run_dir any more: its input changed or is gone, or it predates source records."""
+    try:
+        with open(os.path.join(run_dir, SOURCE_FILE), 'r') as f:
+            source = json.load(f)
+        stat = os.stat(source['path'])
+    except (OSError, ValueError, KeyError):
+        return True
+    return (stat.st_size, stat.st_mtime_ns) != (source['size'], source['mtime_ns'])
+
+
+def prune(scratch_dir, run_dirs, stage_dirs):
+    """
+    Remove the checkpoints no block can reference any more: other run directories whose input
+    changed or is gone, and in run_dirs the directories of other versions of the stages of
+    stage_dirs ({name: versioned directory}) and any unversioned ones (from before stage versions).
+    """
+    if not os.path.isdir(scratch_dir):
+        return
+    current = {os.path.abspath(run_dir) for run_dir in run_dirs}
+    for entry in os.listdir(scratch_dir):
+        run_dir = os.path.join(scratch_dir, entry)
+        if (RUN_DIR_PATTERN.fullmatch(entry) and os.path.isdir(run_dir)
+                and os.path.abspath(run_dir) not in current and _is_stale(run_dir)):
+            shutil.rmtree(run_dir, ignore_errors=True)
+    keep = set(stage_dirs.values()) | {'quarantine'}
+    for run_dir in run_dirs:
+        for entry in os.listdir(run_dir):
+            match = STAGE_DIR_PATTERN.fullmatch(entry)
+            stale = entry not in keep and (match is None or match.group(1) in stage_dirs)
+            if stale and os.path.isdir(os.path.join(run_dir, entry)):
+                shutil.rmtree(os.path.join(run_dir, entry), ignore_errors=True)
+
+
+def _save(obj, path):
+    # Write to a temporary name first so an interrupted write never looks like a checkpoint
+    tmp_path = f'{path}.tmp'
+    pd.to_pickle(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _process_block(fetch, index, stages, run_dir):
+    raw = fetch()
+    quarantine_path = os.path.join(run_dir, 'quarantine', f'part-{index:05d}.jsonl')
+    pdf, n_bad = parse_block(raw, quarantine_path)
+    for stage_dir, func in stages.items():
+        _save(func(pdf), _part_path(run_dir, stage_dir, index))
+    return n_bad
+
+
+def run_stages(stages, path=DATA_PATH, blocksize=BLOCKSIZE, scratch_dir=SCRATCH_DIR, load=True, workers=None):
+    """
+    Apply every function in stages ({name: func(DataFrame) -> result}) to every block of
+    path (a file, or a directory or glob of shards), resuming from existing checkpoints,
+    with up to workers blocks in flight (default: one per core; see memory_plan.py).
+    Returns {name: [per-block results]}, or with load=False {name: [per-block checkpoint
+    paths]} for results too big to hold at once (read them one at a time with load_part).
+    """
+    shards = shard_paths(path)
+    run_dirs = [os.path.join(scratch_dir, source_fingerprint(shard, blocksize)) for shard in shards]
+    stage_dirs = {name: f'{name}-{stage_version(func)}' for name, func in stages.items()}
+    for run_dir, shard in zip(run_dirs, shards):
+        os.makedirs(run_dir, exist_ok=True)
+        _record_source(run_dir, shard, blocksize)
+    prune(scratch_dir, run_dirs, stage_dirs)
+    for run_dir in run_dirs:
+        for stage_dir in stage_dirs.values():
+            os.makedirs(os.path.join(run_dir, stage_dir), exist_ok=True)
+
+    # Compute in small batches so finished blocks are checkpointed while the rest run, and
+    # so serially decompressed blocks are only held in memory a batch at a time
+    batch_size = workers or max(1, os.cpu_count() or 1)
+    blocks = []
+    n_done = 0
+    n_bad = 0
+    batch = []
+    with tqdm(desc="Processing blocks", unit="block") as pbar:
+        for run_dir, shard in zip(run_dirs, shards):
+            for index, fetch in iter_blocks(shard, blocksize):
+                blocks.append((run_dir, index))
+                missing = {stage_dirs[name]: func for name, func in stages.items()
+                           if not os.path.exists(_part_path(run_dir, stage_dirs[name], index))}
+                if not missing:
+                    n_done += 1
+                    pbar.update(1)
+                    continue
+                batch.append(dask.delayed(_process_block)(fetch, index, missing, run_dir))
+                if len(batch) == batch_size:
+                    n_bad += sum(dask.compute(*batch, num_workers=batch_size))
+                    pbar.update(len(batch))
+                    batch = []
+        if batch:
+            n_bad += sum(dask.compute(*batch, num_workers=batch_size))
+            pbar.update(len(batch))
+    where = run_dirs[0] if len(run_dirs) == 1 else os.path.join(scratch_dir, '*')
+    if n_done:
+        print(f"Resumed from checkpoints in {where}: {n_done}/{len(blocks)} blocks already done")
+    if n_bad:
+        print(f"Quarantined {n_bad} malformed records to {os.path.join(where, 'quarantine')}")
+
+    paths = {name: [_part_path(run_dir, stage_dirs[name], index) for run_dir, index in blocks] for name in stages}
+    if not load:
+        return paths
+    return {name: [load_part(part_path) for part_path in part_paths] for name, part_paths in paths.items()}
+
+
+def load_part(part_path):
+    return pd.read_pickle(part_path)
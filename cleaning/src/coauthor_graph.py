@@ -0,0 +1,232 @@
+"""
+Co-authorship graph construction within a fixed RAM budget.
+
+Each snapshot block emits its co-author edges (coauthor_partial, a checkpointed stage): authors
+are keyed by a 64-bit hash of their 'last, first' name, and every pair of authors of a paper is
+an edge, once for the whole graph and once per major category the paper is listed in. Papers
+with more than MAX_AUTHORS_PER_PAPER authors (large collaborations) add no edges.
+
+build_graph then:
+1. interns the author hashes into dense integer ids (sorted hashes, looked up by binary search),
+2. streams the block edges to bucket files on disk, split by source-author range, with both
+   directions of every edge packed into one uint64 key (source, target, major category),
+3. sorts and deduplicates one bucket at a time -- the bucket count is chosen so a bucket fits
+   the memory budget -- and appends the whole-graph rows to a CSR adjacency (indptr, indices,
+   weights = number of co-authored papers), in source order because buckets are source ranges,
+   then copied into the .npy files through memory maps, a budget-sized chunk at a time,
+4. finds connected components per major category with a union-find streamed over the buckets.
+"""
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from aggregates import MAJOR_CATEGORIES, map_major_category, paper_authors, paper_categories
+from checkpoint import load_part
+from sketches import hash64
+
+GRAPH_DIR = 'cleaning/graph'
+MAX_AUTHORS_PER_PAPER = 50
+BRIDGING_TOP = 100
+ALL = len(MAJOR_CATEGORIES)  # category code of the whole graph
+MAJOR_CODES = {name: code for code, name in enumerate(MAJOR_CATEGORIES)}
+ID_BITS = 30
+# Bytes per directed edge row in a bucket (uint64 key + int32 count), times the working copies
+# np.unique needs while sorting a bucket
+EDGE_ROW_BYTES = 12
+SORT_OVERHEAD = 4
+
+
+def coauthor_partial(pdf):
+    """Edges (author_u < author_v hashes, major category code, paper count), author categories and names."""
+    authors = paper_authors(pdf)
+    paper_authors_table = pd.DataFrame({
+        'paper': authors.index.to_numpy(dtype=np.int64),
+        'author': hash64(authors.to_numpy()),
+        'name': authors.to_numpy()
+    }).drop_duplicates(['paper', 'author'])
+    majors = paper_categories(pdf)['category'].map(map_major_category).map(MAJOR_CODES)
+    paper_majors = pd.DataFrame({'paper': majors.index.to_numpy(dtype=np.int64),
+                                 'major': majors.to_numpy(dtype=np.int64)}).drop_duplicates()
+    links = paper_authors_table[['paper', 'author']]
+    sizes = links.groupby('paper').size()
+    links = links[links['paper'].isin(sizes.index[sizes <= MAX_AUTHORS_PER_PAPER])]
+    pairs = links.merge(links, on='paper', suffixes=('_u', '_v'))
+    pairs = pairs[pairs['author_u'] < pairs['author_v']]
+    edges = pd.concat([pairs.assign(major=ALL), pairs.merge(paper_majors, on='paper')], ignore_index=True)
+    return {
+        'edges': edges.groupby(['author_u', 'author_v', 'major']).size().rename('count').reset_index(),
+        'author_majors': paper_authors_table[['paper', 'author']].merge(paper_majors, on='paper')[['author', 'major']].drop_duplicates(),
+        'names': paper_authors_table[['author', 'name']].drop_duplicates('author'),
+    }
+
+
+def _unpack(keys):
+    return ((keys >> np.uint64(ID_BITS + 4)).astype(np.int64),
+            ((keys >> np.uint64(4)) & np.uint64((1 << ID_BITS) - 1)).astype(np.int64),
+            (keys & np.uint64(15)).astype(np.int64))
+
+
+def _bucket_files(bucket_dir, b):
+    return os.path.join(bucket_dir, f'bucket-{b:04d}.keys'), os.path.join(bucket_dir, f'bucket-{b:04d}.counts')
+
+
+def _copy_to_npy(raw_path, npy_path, n, memory_budget):
+    """Copy n raw int32 values into a .npy file through a memory map, a budget-sized chunk at a time."""
+    chunk = max(1, memory_budget // (2 * np.dtype(np.int32).itemsize))
+    target = np.lib.format.open_memmap(npy_path, mode='w+', dtype=np.int32, shape=(n,))
+    with open(raw_path, 'rb') as f:
+        for start in range(0, n, chunk):
+            target[start:start + chunk] = np.fromfile(f, dtype=np.int32, count=min(chunk, n - start))
+    target.flush()
+    del target
+
+
+def connected_components(n, edge_chunks):
+    """Union-find over edges streamed as (u, v) chunks by edge_chunks(); returns each node's root."""
+    parent = np.arange(n, dtype=np.int64)
+    changed = True
+    while changed:
+        changed = False
+        for u, v in edge_chunks():
+            pu, pv = parent[u], parent[v]
+            differ = pu != pv
+            if differ.any():
+                changed = True
+                np.minimum.at(parent, np.maximum(pu, pv)[differ], np.minimum(pu, pv)[differ])
+                while True:
+                    grandparent = parent[parent]
+                    if np.array_equal(grandparent, parent):
+                        break
+                    parent = grandparent
+    return parent
+
+
+def build_graph(part_paths, memory_budget, graph_dir=GRAPH_DIR):
+    """Build the CSR co-author graph from coauthor_partial checkpoints; returns the statistics tables."""
+    print("Interning author ids...")
+    hashes = []
+    n_edge_rows = 0
+    for part_path in tqdm(part_paths, desc="Reading blocks"):
+        part = load_part(part_path)
+        hashes.append(part['author_majors']['author'].unique())
+        n_edge_rows += len(part['edges'])
+    author_hashes = np.unique(np.concatenate(hashes)) if hashes else np.zeros(0, dtype=np.uint64)
+    del hashes
+    n = len(author_hashes)
+    if n >= 1 << ID_BITS:
+        raise ValueError(f"{n} authors do not fit in {ID_BITS}-bit ids")
+
+    n_buckets = max(1, math.ceil(2 * n_edge_rows * EDGE_ROW_BYTES * SORT_OVERHEAD / memory_budget))
+    print(f"{n} authors, about {n_edge_rows} edge rows; using {n_buckets} bucket(s) for a {memory_budget / 2**20:.0f}MB budget")
+    bucket_dir = os.path.join(graph_dir, 'buckets')
+    shutil.rmtree(bucket_dir, ignore_errors=True)
+    os.makedirs(bucket_dir)
+    membership = np.zeros((ALL + 1, n), dtype=bool)
+    membership[ALL] = True
+    for part_path in tqdm(part_paths, desc="Emitting edges"):
+        part = load_part(part_path)
+        author_majors = part['author_majors']
+        membership[author_majors['major'].to_numpy(), np.searchsorted(author_hashes, author_majors['author'].to_numpy())] = True
+        edges = part['edges']
+        u = np.searchsorted(author_hashes, edges['author_u'].to_numpy())
+        v = np.searchsorted(author_hashes, edges['author_v'].to_numpy())
+        src, dst = np.concatenate([u, v]), np.concatenate([v, u])
+        major = np.tile(edges['major'].to_numpy(dtype=np.int64), 2)
+        counts = np.tile(edges['count'].to_numpy(dtype=np.int32), 2)
+        keys = (src.astype(np.uint64) << np.uint64(ID_BITS + 4)) | (dst.astype(np.uint64) << np.uint64(4)) | major.astype(np.uint64)
+        bucket = src * n_buckets // max(n, 1)
+        order = np.argsort(bucket, kind='stable')
+        bounds = np.searchsorted(bucket[order], np.arange(n_buckets + 1))
+        for b in range(n_buckets):
+            rows = order[bounds[b]:bounds[b + 1]]
+            if len(rows):
+                keys_path, counts_path = _bucket_files(bucket_dir, b)
+                with open(keys_path, 'ab') as f:
+                    keys[rows].tofile(f)
+                with open(counts_path, 'ab') as f:
+                    counts[rows].tofile(f)
+
+    degree = np.zeros(n, dtype=np.int64)
+    degree_hist = {code: np.zeros(1, dtype=np.int64) for code in range(ALL + 1)}
+    n_edges = np.zeros(ALL + 1, dtype=np.int64)
+    indices_path = os.path.join(graph_dir, 'indices.bin')
+    weights_path = os.path.join(graph_dir, 'weights.bin')
+    with open(indices_path, 'wb') as indices_file, open(weights_path, 'wb') as weights_file:
+        for b in tqdm(range(n_buckets), desc="Sorting buckets"):
+            keys_path, counts_path = _bucket_files(bucket_dir, b)
+            if not os.path.exists(keys_path):
+                continue
+            keys, inverse = np.unique(np.fromfile(keys_path, dtype=np.uint64), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.fromfile(counts_path, dtype=np.int32)).astype(np.int32)
+            keys.tofile(keys_path)  # deduplicated and sorted, for the component passes
+            src, dst, major = _unpack(keys)
+            whole = major == ALL
+            dst[whole].astype(np.int32).tofile(indices_file)
+            counts[whole].tofile(weights_file)
+            degree += np.bincount(src[whole], minlength=n)
+            n_edges += np.bincount(major, minlength=ALL + 1)
+            # A source's rows all sit in this bucket, so its per-category degrees are complete here
+            sources, per_category_degree = np.unique(major * n + src, return_counts=True)
+            degree_major = sources // n
+            for code in range(ALL + 1):
+                hist = np.bincount(per_category_degree[degree_major == code])
+                if len(hist) > len(degree_hist[code]):
+                    hist[:len(degree_hist[code])] += degree_hist[code]
+                    degree_hist[code] = hist
+                else:
+                    degree_hist[code][:len(hist)] += hist
+
+    np.save(os.path.join(graph_dir, 'indptr.npy'), np.concatenate(([0], np.cumsum(degree))))
+    for raw_path, name in [(indices_path, 'indices.npy'), (weights_path, 'weights.npy')]:
+        _copy_to_npy(raw_path, os.path.join(graph_dir, name), int(degree.sum()), memory_budget)
+        os.remove(raw_path)
+    np.save(os.path.join(graph_dir, 'author_hashes.npy'), author_hashes)
+
+    component_rows = []
+    degree_rows = []
+    for code in tqdm(range(ALL + 1), desc="Connected components"):
+        def edge_chunks():
+            for b in range(n_buckets):
+                keys_path, _ = _bucket_files(bucket_dir, b)
+                if os.path.exists(keys_path):
+                    src, dst, major = _unpack(np.fromfile(keys_path, dtype=np.uint64))
+                    keep = (major == code) & (src < dst)
+                    yield src[keep], dst[keep]
+
+        members = membership[code]
+        roots = connected_components(n, edge_chunks)[members]
+        sizes = np.bincount(roots)
+        sizes = sizes[sizes > 0]
+        label = 'All' if code == ALL else MAJOR_CATEGORIES[code]
+        n_authors = int(members.sum())
+        component_rows.append({
+            'major_category': label, 'authors': n_authors, 'edges': int(n_edges[code] // 2),
+            'components': len(sizes), 'largest_component': int(sizes.max()) if len(sizes) else 0,
+            'largest_component_share': sizes.max() / n_authors if n_authors else 0.0,
+        })
+        hist = degree_hist[code].copy()
+        hist[0] = n_authors - hist[1:].sum()  # members without co-authors in this category
+        degree_rows.extend({'major_category': label, 'degree': d, 'authors': int(c)}
+                           for d, c in enumerate(hist) if c)
+    shutil.rmtree(bucket_dir)
+
+    n_majors = membership[:ALL].sum(axis=0)
+    bridging = pd.DataFrame({'author_id': np.arange(n), 'major_categories': n_majors, 'degree': degree})
+    bridging = bridging[bridging['major_categories'] >= 2].sort_values(
+        ['major_categories', 'degree'], ascending=False).head(BRIDGING_TOP)
+    wanted = pd.Series(bridging['author_id'].to_numpy(), index=author_hashes[bridging['author_id'].to_numpy()])
+    names = {}
+    for part_path in part_paths:
+        part_names = load_part(part_path)['names']
+        part_names = part_names[part_names['author'].isin(wanted.index)]
+        names.update(zip(wanted[part_names['author']].to_numpy(), part_names['name']))
+        if len(names) == len(wanted):
+            break
+    bridging['author'] = bridging['author_id'].map(names)
+    bridging['categories'] = [', '.join(MAJOR_CATEGORIES[c] for c in np.flatnonzero(membership[:ALL, i]))
+                              for i in bridging['author_id']]
+    return pd.DataFrame(component_rows), pd.DataFrame(degree_rows), bridging[['author_id', 'author', 'major_categories', 'categories', 'degree']]
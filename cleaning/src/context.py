@@ -0,0 +1,197 @@
+"""
+Run context shared by the pipeline scripts.
+
+Every script exposes main(context), plus add_arguments(parser) if it has options. Run on its
+own, a script builds a context from its command line (Context.from_command_line); run_all.py
+runs any subset of scripts in one process with one context, so each library is imported once
+and data loaded by one script -- the category-month counts, shared block stage results, CSV and
+JSON assets -- is reused by the next ones instead of being recomputed or re-read.
+
+Scripts that process the snapshot block by block also expose block_stages(context), the stages
+they will pass to context.run_stages. run_all.py runs the stages of all selected scripts in one
+pass (Context.prepare_stages), so the snapshot is parsed once per run, not once per script.
+
+Scripts import pandas, numpy, dask, matplotlib and the library modules inside the functions that
+use them, so importing a script (e.g. to build the pipeline's command line) stays cheap.
+"""
+import argparse
+import copy
+import json
+import os
+
+ENGINES = ('dask', 'mmap')
+PREVIEW_DIR = 'cleaning/asset/preview'
+# How a paper listed in n categories is counted: full (once in each), primary (once, in the first
+# listed category) or fractional (1/n in each); the count scripts write one table per mode
+COUNTINGS = ('full', 'primary', 'fractional')
+
+
+def counting_path(path, counting):
+    """Where the table of a counting mode goes: path itself for full counts, else suffixed."""
+    if counting == 'full':
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}_{counting}{ext}'
+
+
+def add_input_arguments(parser):
+    """Options every script accepts."""
+    parser.add_argument('--data', metavar='PATH',
+                        help="input snapshot file, or a directory or glob of snapshot shards, compressed or not "
+                             "(default: data/arxiv-metadata-oai-snapshot.json)")
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="MB of RAM for the cleaning stage: block size and worker count are tuned to it from a "
+                             "sample of parsed blocks (see memory_plan.py), and the co-author edge sort uses it "
+                             "(default: 64MB blocks on every core; 1024MB for the sort)")
+
+
+def add_count_arguments(parser):
+    """Options of the category-month count scripts."""
+    parser.add_argument('--engine', choices=ENGINES, default='dask',
+                        help="dask: checkpointed block engine; mmap: memory-mapped scanner (uncompressed input only)")
+    parser.add_argument('--collapse-duplicates', action='store_true',
+                        help="count each near-duplicate cluster (from extract_duplicate_clusters.py) once")
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                        help=f"estimate from a random sample of this fraction of the file, with 95%% intervals, into {PREVIEW_DIR}/")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of --sample")
+
+
+class Context:
+    """Options of the run and a cache of data shared between scripts."""
+
+    def __init__(self, options=None):
+        self.options = options if options is not None else argparse.Namespace()
+        self._cache = {}
+
+    @classmethod
+    def from_command_line(cls, description, *add_arguments, args=None):
+        """Context with the options defined by add_arguments functions, parsed from the command line."""
+        parser = argparse.ArgumentParser(description=description.strip().splitlines()[0], conflict_handler='resolve')
+        for add in (add_input_arguments,) + add_arguments:
+            add(parser)
+        return cls(parser.parse_args(args))
+
+    def option(self, name, default=None):
+        return getattr(self.options, name, default)
+
+    @property
+    def data_path(self):
+        """The input of the run: --data if given, else ingest.DATA_PATH."""
+        from ingest import DATA_PATH, resolve_data_path
+        data = self.option('data')
+        return resolve_data_path(data) if data else DATA_PATH
+
+    def cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def prepare_stages(self, stages, path=None):
+        """
+        Run stages in one checkpoint.run_stages pass and keep their checkpoint paths, so later
+        run_stages calls read those stages from the checkpoints instead of parsing the snapshot
+        again. run_all.py calls it with the block stages of every selected script.
+        """
+        from checkpoint import run_stages
+        path = path or self.data_path
+        for name, part_paths in run_stages(stages, path, load=False, **self.block_options(path)).items():
+            self._cache[('stage', name, path, False)] = part_paths
+
+    def run_stages(self, stages, path=None, share=(), load=True):
+        """
+        checkpoint.run_stages, except that stages run by prepare_stages are read from their
+        checkpoints, and results of the stages named in share are kept for the rest of the run
+        and not recomputed (or reloaded from checkpoints) by later scripts.
+        """
+        from checkpoint import load_part, run_stages
+        path = path or self.data_path
+        results = {}
+        for name in stages:
+            if ('stage', name, path, load) in self._cache:
+                results[name] = self._cache[('stage', name, path, load)]
+            elif load and ('stage', name, path, False) in self._cache:
+                results[name] = [load_part(part_path) for part_path in self._cache[('stage', name, path, False)]]
+        missing = {name: func for name, func in stages.items() if name not in results}
+        if missing:
+            results.update(run_stages(missing, path, load=load, **self.block_options(path)))
+        for name in share:
+            if name in results:
+                self._cache[('stage', name, path, load)] = results[name]
+        return {name: results[name] for name in stages}
+
+    def category_month_stages(self):
+        """Block stages of category_month_counts for the run's options: none with --engine mmap or --sample."""
+        from aggregates import CATEGORY_MONTH, category_month_partial
+        if self.option('engine', 'dask') == 'mmap' or self.option('sample'):
+            return {}
+        return {CATEGORY_MONTH: category_month_partial}
+
+    def block_options(self, path=None):
+        """
+        Block size and workers of checkpoint.run_stages for the run's --memory-budget, planned
+        once per input and logged; empty (the defaults) without a budget.
+        """
+        memory_budget = self.option('memory_budget')
+        if not memory_budget:
+            return {}
+        from memory_plan import describe, plan_blocks
+        path = path or self.data_path
+
+        def plan():
+            blocks = plan_blocks(path, memory_budget * 2**20)
+            print(describe(blocks, memory_budget * 2**20))
+            return blocks
+
+        blocks = self.cached(('block_plan', path, memory_budget), plan)
+        return {'blocksize': blocks['blocksize'], 'workers': blocks['workers']}
+
+    def category_month_counts(self, path=None, collapse_duplicates=None):
+        """
+        The snapshot's category-month counts for the run's --engine option, and its
+        --collapse-duplicates option unless collapse_duplicates is given.
+        """
+        from aggregates import CATEGORY_MONTH, category_month_counts
+        path = path or self.data_path
+        engine = self.option('engine', 'dask')
+        if collapse_duplicates is None:
+            collapse_duplicates = self.option('collapse_duplicates', False)
+
+        def stage_runner(stages, path):
+            return self.run_stages(stages, path, share=[CATEGORY_MONTH])
+
+        counts = self.cached(('category_month_counts', path, engine, collapse_duplicates),
+                             lambda: category_month_counts(path, engine, collapse_duplicates, stage_runner))
+        return counts.copy()
+
+    def sampled_category_month_units(self, path=None):
+        """Per-unit counts of the run's --sample/--seed byte-range sample, also saved for roll-ups."""
+        from sampling import UNITS_PATH, sample_category_month_units
+        path = path or self.data_path
+        fraction, seed = self.option('sample'), self.option('seed', 0)
+        if self.option('collapse_duplicates'):
+            raise ValueError("--collapse-duplicates cannot be combined with --sample")
+
+        def sample():
+            units = sample_category_month_units(path, fraction, seed)
+            os.makedirs(PREVIEW_DIR, exist_ok=True)
+            units.to_csv(UNITS_PATH, index=False)
+            return units
+
+        return self.cached(('sampled_units', path, fraction, seed), sample).copy()
+
+    def _file_key(self, kind, path):
+        stat = os.stat(path)
+        return (kind, path, stat.st_size, stat.st_mtime_ns)
+
+    def read_csv(self, path, **kwargs):
+        """pandas.read_csv, cached until the file changes (FileNotFoundError if it does not exist)."""
+        import pandas as pd
+        key = self._file_key('csv', path) + (repr(sorted(kwargs.items())),)
+        return self.cached(key, lambda: pd.read_csv(path, **kwargs)).copy()
+
+    def read_json(self, path):
+        """Parsed JSON file, cached until the file changes (FileNotFoundError if it does not exist)."""
+        def load():
+            with open(path, 'r') as f:
+                return json.load(f)
+        return copy.deepcopy(self.cached(self._file_key('json', path), load))
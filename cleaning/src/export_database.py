@@ -0,0 +1,156 @@
+"""
+Exports the aggregate CSVs in cleaning/asset/ and a slim per-paper table to an indexed SQLite
+database, cleaning/database/arxiv.sqlite, for ad-hoc SQL:
+
+- one table per aggregate CSV that exists (category_month_counts, major_category_month_counts, ...)
+- papers: id, primary category (the first one listed), all categories, month, version count; an id
+  found in several shards keeps its latest version (the most versions)
+- paper_categories: one (id, category) row per listed category
+
+Rows are bulk-loaded with batched executemany inside one transaction, indexes are created after
+loading, and the file is built under a temporary name and swapped in when complete. The papers
+table is built per block as a checkpointed stage.
+
+    sqlite3 cleaning/database/arxiv.sqlite "SELECT month, count FROM category_month_counts WHERE categories_list = 'cs.LG'"
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sqlite3
+import sys
+
+from context import Context
+
+DATABASE_PATH = 'cleaning/database/arxiv.sqlite'
+ASSET_DIR = 'cleaning/asset'
+PAPER_TABLE = 'paper_table'
+BATCH_SIZE = 50_000
+# Aggregate tables and their indexes; tables whose CSV has not been generated are skipped
+AGGREGATES = {
+    'category_month_counts': [('categories_list', 'month'), ('month',)],
+    'major_category_month_counts': [('major_category', 'month'), ('month',)],
+    'total_category_month_counts': [('month',)],
+    'category_month_counts_primary': [('categories_list', 'month'), ('month',)],
+    'major_category_month_counts_primary': [('major_category', 'month'), ('month',)],
+    'total_category_month_counts_primary': [('month',)],
+    'category_month_counts_fractional': [('categories_list', 'month'), ('month',)],
+    'major_category_month_counts_fractional': [('major_category', 'month'), ('month',)],
+    'total_category_month_counts_fractional': [('month',)],
+    'category_trends': [('level', 'category', 'month')],
+    'category_growth_summary': [('level', 'category')],
+    'category_forecast': [('level', 'category', 'month')],
+    'distinct_authors_category_month': [('category', 'month')],
+    'distinct_authors_major_category_year': [('major_category', 'year')],
+    'top_submitters_by_category_year': [('major_category', 'year')],
+    'top_authors_by_category_year': [('major_category', 'year')],
+    'duplicate_clusters': [('cluster',), ('id',)],
+    'revision_versions_category_year': [('category', 'year')],
+    'revision_lag_category_year': [('category', 'year')],
+    'journal_uptake_category_year': [('category', 'year')],
+    'publication_lag_category_year': [('category', 'year')],
+}
+PAPER_SCHEMA = [
+    'CREATE TABLE papers (id TEXT PRIMARY KEY, primary_category TEXT, categories TEXT, month TEXT, n_versions INTEGER)',
+    'CREATE TABLE paper_categories (id TEXT, category TEXT)',
+]
+# A paper harvested into more than one shard keeps its latest version: the row with the most
+# versions, or the later shard's on a tie
+PAPER_UPSERT = ('INSERT INTO papers VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET '
+                'primary_category = excluded.primary_category, categories = excluded.categories, '
+                'month = excluded.month, n_versions = excluded.n_versions '
+                'WHERE excluded.n_versions >= papers.n_versions')
+PAPER_INDEXES = {'papers': [('primary_category', 'month'), ('month',)], 'paper_categories': [('category', 'id')]}
+SQL_TYPES = {'i': 'INTEGER', 'u': 'INTEGER', 'f': 'REAL', 'b': 'INTEGER'}
+
+def paper_table_partial(pdf):
+    import pandas as pd
+    categories = pdf['categories'].fillna('')
+    return pd.DataFrame({
+        'id': pdf['id'].astype(str),
+        'primary_category': categories.str.split().str[0],
+        'categories': categories,
+        'month': pdf['update_date'].str[:7],
+        'n_versions': pdf['versions'].str.len().fillna(0).astype('int64'),
+    }).reset_index(drop=True)
+
+def insert_rows(conn, table, frame, statement=None):
+    placeholders = ', '.join('?' * len(frame.columns))
+    rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(statement or f'INSERT INTO {table} VALUES ({placeholders})', rows)
+
+def create_indexes(conn, table, indexes):
+    for columns in indexes:
+        conn.execute(f'CREATE INDEX idx_{table}_{"_".join(columns)} ON {table} ({", ".join(columns)})')
+
+def export_aggregate(conn, table, indexes):
+    import pandas as pd
+    path = os.path.join(ASSET_DIR, f'{table}.csv')
+    if not os.path.exists(path):
+        print(f"Skipping {table}: {path} not found")
+        return
+    n_rows = 0
+    for i, chunk in enumerate(pd.read_csv(path, chunksize=BATCH_SIZE, keep_default_na=False, na_values=[''])):
+        if i == 0:
+            columns = ', '.join(f'"{name}" {SQL_TYPES.get(dtype.kind, "TEXT")}' for name, dtype in chunk.dtypes.items())
+            conn.execute(f'CREATE TABLE {table} ({columns})')
+        insert_rows(conn, table, chunk)
+        n_rows += len(chunk)
+    create_indexes(conn, table, indexes)
+    print(f"Exported {n_rows} rows to {table}")
+
+def export_papers(conn, part_paths):
+    import pandas as pd
+    from tqdm import tqdm
+    from checkpoint import load_part
+    for statement in PAPER_SCHEMA:
+        conn.execute(statement)
+    n_records = 0
+    for part_path in tqdm(part_paths, desc="Loading papers"):
+        papers = load_part(part_path)
+        for start in range(0, len(papers), BATCH_SIZE):
+            insert_rows(conn, 'papers', papers.iloc[start:start + BATCH_SIZE], PAPER_UPSERT)
+        n_records += len(papers)
+    # Category links of the kept rows only, so they agree with papers for duplicated ids
+    cursor = conn.execute('SELECT id, categories FROM papers')
+    while True:
+        batch = pd.DataFrame(cursor.fetchmany(BATCH_SIZE), columns=['id', 'categories'])
+        if batch.empty:
+            break
+        links = batch.assign(category=batch['categories'].str.split())[['id', 'category']].explode('category').dropna()
+        insert_rows(conn, 'paper_categories', links)
+    for table, indexes in PAPER_INDEXES.items():
+        create_indexes(conn, table, indexes)
+    n_rows = conn.execute('SELECT COUNT(*) FROM papers').fetchone()[0]
+    print(f"Exported {n_rows} rows to papers ({n_records - n_rows} duplicate records of the same id merged)")
+
+def block_stages(context):
+    return {PAPER_TABLE: paper_table_partial}
+
+def main(context):
+    print(f"Loading {context.data_path} ...")
+    tmp_path = f'{DATABASE_PATH}.tmp'
+    try:
+        print("Building the per-paper table (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)[PAPER_TABLE]
+        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        # Bulk load: no rollback journal or fsyncs, the file is only swapped in once complete
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        with conn:
+            for table, indexes in AGGREGATES.items():
+                export_aggregate(conn, table, indexes)
+            export_papers(conn, part_paths)
+        conn.execute('ANALYZE')
+        conn.close()
+        os.replace(tmp_path, DATABASE_PATH)
+        print(f"Saved to {DATABASE_PATH}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
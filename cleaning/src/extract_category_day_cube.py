@@ -0,0 +1,38 @@
+"""
+Counts papers per day and category and saves the day x category cube with its week, month,
+quarter and year rollups to cleaning/asset/category_day_cube.npz (see time_cube.py)
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+CATEGORY_DAY = 'category_day'
+
+def block_stages(context):
+    from time_cube import category_day_partial
+    return {CATEGORY_DAY: category_day_partial}
+
+def main(context):
+    from aggregates import merge_counts
+    from time_cube import CUBE_PATH, build_cube, save_cube
+
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Computing category-day counts (this may take a while)...")
+        partials = context.run_stages(block_stages(context), context.data_path)
+        cube = build_cube(merge_counts(partials[CATEGORY_DAY], ['day', 'category']))
+        print(f"{len(cube['day_periods'])} days x {len(cube['categories'])} categories, "
+              f"{cube['day_periods'][0]} to {cube['day_periods'][-1]}")
+        os.makedirs('cleaning/asset', exist_ok=True)
+        save_cube(cube, CUBE_PATH)
+        print(f"Saved to {CUBE_PATH}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
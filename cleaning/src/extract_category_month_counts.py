@@ -1,51 +1,55 @@
 """
 Extracts category-month counts from arxiv-metadata JSON and saves to cleaning/asset/category_month_counts.csv
 
+Also writes the primary-only and fractional counting modes next to it, under the same name with
+_primary and _fractional suffixes (see context.COUNTINGS).
+
 Source data: arXiv metadata snapshot
 Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
 """
-import dask.dataframe as dd
-import pandas as pd
-from tqdm import tqdm
+import sys
 import os
 
-DATA_PATH = 'data/arxiv-metadata-oai-snapshot.json'
+from context import COUNTINGS, Context, add_count_arguments, counting_path
+
 OUTPUT_PATH = 'cleaning/asset/category_month_counts.csv'
 
-def main():
-    print(f"Loading {DATA_PATH} ...")
+def add_arguments(parser):
+    add_count_arguments(parser)
+
+def block_stages(context):
+    return context.category_month_stages()
+
+def main(context):
+    from tqdm import tqdm
+    from aggregates import COUNT_COLUMNS, counting_table
+    from sampling import estimate_totals, preview_path
+
+    print(f"Loading {context.data_path} ...")
     try:
-        dtypes = {
-            'id': 'object',
-            'submitter': 'object',
-            'authors': 'object',
-            'title': 'object',
-            'comments': 'object',
-            'journal-ref': 'object',
-            'doi': 'object',
-            'report-no': 'object',
-            'categories': 'object',
-            'license': 'object',
-            'abstract': 'object',
-            'versions': 'object',
-            'update_date': 'object',
-            'authors_parsed': 'object'
-        }
-        ddf = dd.read_json(DATA_PATH, lines=True, blocksize="64MB", dtype=dtypes)
-        ddf['month'] = ddf['update_date'].str[:7]
-        ddf['categories_list'] = ddf['categories'].str.split()
-        ddf_exploded = ddf.explode('categories_list')
-        print("Computing category-month counts (this may take a while)...")
-        cat_month_counts = ddf_exploded.groupby(['month', 'categories_list']).size().compute().reset_index(name='count')
+        sample = context.option('sample')
+        if sample:
+            print(f"Estimating from a {sample:.1%} byte-range sample...")
+            units = context.sampled_category_month_units(context.data_path)
+            tables = {counting: estimate_totals(units, ['month', 'categories_list'], COUNT_COLUMNS[counting]) for counting in COUNTINGS}
+            output_path = preview_path(OUTPUT_PATH)
+        else:
+            print("Computing category-month counts (this may take a while)...")
+            cat_month_counts = context.category_month_counts(context.data_path)
+            tables = {counting: counting_table(cat_month_counts, ['month', 'categories_list'], counting) for counting in COUNTINGS}
+            output_path = OUTPUT_PATH
         print("Writing CSV with progress bar...")
         os.makedirs('cleaning/asset', exist_ok=True)
         # Progress bar for writing CSV
-        with tqdm(total=len(cat_month_counts), desc="Saving rows") as pbar:
-            cat_month_counts.to_csv(OUTPUT_PATH, index=False)
-            pbar.update(len(cat_month_counts))
-        print(f"Saved to {OUTPUT_PATH}")
+        with tqdm(total=sum(len(table) for table in tables.values()), desc="Saving rows") as pbar:
+            for counting, table in tables.items():
+                table.to_csv(counting_path(output_path, counting), index=False)
+                pbar.update(len(table))
+        for counting in COUNTINGS:
+            print(f"Saved to {counting_path(output_path, counting)}")
     except Exception as e:
         print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    main(Context.from_command_line(__doc__, add_arguments))
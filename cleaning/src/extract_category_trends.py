@@ -0,0 +1,128 @@
+"""
+Computes time-series analytics over the category-month count cube (cleaning/asset/category_month_counts.csv)
+and saves chart-ready tables to cleaning/asset/:
+
+- category_trends.csv: monthly count, rolling 12-month sum, rolling 12-month growth and year-over-year growth
+- category_seasonality.csv: month-of-year seasonal index (median ratio to a centred 12-month moving average)
+- category_growth_summary.csv: yearly CAGR and the fitted trend per category
+- category_forecast.csv: seasonal log-linear trend forecast for the next FORECAST_MONTHS months
+
+Every series is a column of one month x category matrix, so all statistics are computed for all
+subcategories, main categories and the overall total at once, without per-category loops.
+"""
+import os
+import sys
+
+from context import Context
+
+COUNT_PATH = 'cleaning/asset/category_month_counts.csv'
+TRENDS_PATH = 'cleaning/asset/category_trends.csv'
+SEASONALITY_PATH = 'cleaning/asset/category_seasonality.csv'
+SUMMARY_PATH = 'cleaning/asset/category_growth_summary.csv'
+FORECAST_PATH = 'cleaning/asset/category_forecast.csv'
+
+FIT_MONTHS = 36  # trailing window for the forecast trend fit
+FORECAST_MONTHS = 12
+
+def get_main_category(cat):
+    return cat.split('.')[0] if '.' in cat else cat
+
+def build_cube(df):
+    """Month x series matrix with (level, category) columns for subcategories, main categories and the total."""
+    import pandas as pd
+    sub = df.pivot_table(index='month', columns='categories_list', values='count', aggfunc='sum', fill_value=0)
+    sub.index = pd.PeriodIndex(sub.index, freq='M')
+    sub = sub.reindex(pd.period_range(sub.index.min(), sub.index.max(), freq='M'), fill_value=0)
+    main = sub.T.groupby(sub.columns.map(get_main_category)).sum().T
+    total = sub.sum(axis=1).to_frame('all')
+    cube = pd.concat({'subcategory': sub, 'main': main, 'total': total}, axis=1, names=['level', 'category'])
+    return cube.astype(float)
+
+def seasonal_indices(cube):
+    """
+    Month-of-year index per series: median ratio to the centred 2x12 moving average, normalised
+    to mean 1. The median keeps one-off spikes (the 2007-05 bulk load) from skewing a month.
+    """
+    centred = cube.rolling(12).mean().rolling(2).mean().shift(-6)
+    ratio = (cube / centred.where(centred > 0)).groupby(cube.index.month).median()
+    ratio = ratio.reindex(range(1, 13))
+    return ratio / ratio.mean()
+
+def fit_trend(cube, seasonal):
+    """Least-squares line through log1p of the deseasonalised trailing FIT_MONTHS, for all series at once."""
+    import numpy as np
+    window = cube.iloc[-FIT_MONTHS:]
+    factors = seasonal.reindex(window.index.month).fillna(1.0).to_numpy()
+    y = np.log1p(window.to_numpy() / np.where(factors > 0, factors, 1.0))
+    x = np.arange(len(window), dtype=float)
+    x_centred = x - x.mean()
+    slope = (x_centred[:, None] * (y - y.mean(axis=0))).sum(axis=0) / (x_centred ** 2).sum()
+    intercept = y.mean(axis=0) - slope * x.mean()
+    return slope, intercept, len(window)
+
+def main(context):
+    import numpy as np
+    import pandas as pd
+
+    print(f"Loading {COUNT_PATH} ...")
+    try:
+        df = context.read_csv(COUNT_PATH)
+        cube = build_cube(df)
+        print(f"Computing trends for {cube.shape[1]} series over {cube.shape[0]} months...")
+
+        rolling = cube.rolling(12).sum()
+        trends = pd.concat({
+            'count': cube,
+            'rolling_12m': rolling,
+            'growth_12m': rolling / rolling.shift(12).where(rolling.shift(12) > 0) - 1,
+            'yoy': cube / cube.shift(12).where(cube.shift(12) > 0) - 1,
+        }, axis=1, names=['metric']).stack(level=['level', 'category'], future_stack=True)
+        trends.index.names = ['month', 'level', 'category']
+        trends = trends.reset_index()
+        trends['month'] = trends['month'].astype(str)
+
+        seasonal = seasonal_indices(cube)
+        seasonality = seasonal.rename_axis('month_of_year').stack(['level', 'category'], future_stack=True)
+        seasonality = seasonality.rename('seasonal_index').reset_index()
+
+        # CAGR between the first full year with papers and the last full year
+        month_counts = pd.Series(cube.index.year).value_counts()
+        full_years = month_counts[month_counts == 12].index
+        yearly = cube.groupby(cube.index.year).sum().loc[sorted(full_years)]
+        has_papers = (yearly > 0).to_numpy()
+        first_pos = np.where(has_papers.any(axis=0), has_papers.argmax(axis=0), len(yearly) - 1)
+        first_counts = yearly.to_numpy()[first_pos, np.arange(yearly.shape[1])]
+        n_years = len(yearly) - 1 - first_pos
+        last_counts = yearly.iloc[-1].to_numpy() if len(yearly) else np.zeros(cube.shape[1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cagr = np.where((n_years > 0) & (first_counts > 0), (last_counts / first_counts) ** (1 / n_years) - 1, np.nan)
+
+        slope, intercept, n_fit = fit_trend(cube, seasonal)
+        summary = pd.DataFrame({
+            'level': cube.columns.get_level_values('level'),
+            'category': cube.columns.get_level_values('category'),
+            'first_year': np.asarray(yearly.index)[first_pos] if len(yearly) else np.nan,
+            'last_year': yearly.index[-1] if len(yearly) else np.nan,
+            'cagr': cagr,
+            'trend_monthly_growth': np.expm1(slope),
+        })
+
+        horizon = pd.period_range(cube.index[-1] + 1, periods=FORECAST_MONTHS, freq='M')
+        steps = np.arange(n_fit, n_fit + FORECAST_MONTHS, dtype=float)
+        factors = seasonal.reindex(horizon.month).fillna(1.0).to_numpy()
+        forecast = pd.DataFrame(np.clip(np.expm1(intercept + np.outer(steps, slope)), 0, None) * factors,
+                                index=horizon.astype(str), columns=cube.columns)
+        forecast = forecast.rename_axis('month').stack(['level', 'category'], future_stack=True)
+        forecast = forecast.rename('forecast').reset_index()
+
+        os.makedirs('cleaning/asset', exist_ok=True)
+        for table, path in [(trends, TRENDS_PATH), (seasonality, SEASONALITY_PATH),
+                            (summary, SUMMARY_PATH), (forecast, FORECAST_PATH)]:
+            table.to_csv(path, index=False)
+            print(f"Saved to {path}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
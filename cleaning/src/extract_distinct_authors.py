@@ -0,0 +1,102 @@
+"""
+Estimates distinct authors per category-month with HyperLogLog sketches and saves:
+- cleaning/asset/distinct_authors_category_month.csv
+- cleaning/asset/distinct_authors_major_category_year.csv
+
+One sparse HyperLogLog per (month, category) is built for each block; the blocks are read back one
+at a time and their sketches merged and rolled up to (year, major category) by taking register
+maxima, so memory stays fixed per group however many authors there are. --compare-exact also computes exact distinct
+counts (only practical on small or synthetic snapshots) and reports the sketch error.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+MONTH_OUTPUT_PATH = 'cleaning/asset/distinct_authors_category_month.csv'
+YEAR_OUTPUT_PATH = 'cleaning/asset/distinct_authors_major_category_year.csv'
+AUTHOR_HLL = 'author_hll'
+AUTHOR_EXACT = 'author_exact'
+
+def author_rows(pdf):
+    from aggregates import paper_authors, paper_categories
+    authors = paper_authors(pdf).rename('author')
+    return paper_categories(pdf).join(authors, how='inner')
+
+def author_hll_partial(pdf):
+    from sketches import hll_registers
+    rows = author_rows(pdf)
+    return hll_registers(rows[['month', 'category']], rows['author'].to_numpy())
+
+def author_exact_partial(pdf):
+    return author_rows(pdf).drop_duplicates()
+
+def with_rollup_keys(table):
+    from aggregates import map_major_category
+    table = table.copy()
+    table['year'] = table['month'].str[:4]
+    table['major_category'] = table['category'].map(map_major_category)
+    return table
+
+def report_error(estimate, exact, label):
+    import pandas as pd
+    joined = pd.concat([estimate, exact.rename('exact')], axis=1).fillna(0)
+    rel_error = (joined['estimate'] - joined['exact']).abs() / joined['exact'].where(joined['exact'] > 0)
+    print(f"{label}: {len(joined)} groups, mean relative error {rel_error.mean():.2%}, "
+          f"max {rel_error.max():.2%}, total exact {int(joined['exact'].sum())} vs estimated {joined['estimate'].sum():.0f}")
+
+def add_arguments(parser):
+    parser.add_argument('--compare-exact', action='store_true', help="also count exactly and report the sketch error")
+
+def block_stages(context):
+    stages = {AUTHOR_HLL: author_hll_partial}
+    if context.option('compare_exact', False):
+        stages[AUTHOR_EXACT] = author_exact_partial
+    return stages
+
+def merge_partials(part_paths, compare_exact):
+    """Fold the blocks' HLL registers (and exact author rows) together, reading one block at a time."""
+    import pandas as pd
+    from checkpoint import load_part
+    from sketches import hll_merge
+    registers = exact = None
+    for part_path in part_paths[AUTHOR_HLL]:
+        registers = hll_merge([registers, load_part(part_path)], ['month', 'category'])
+    if compare_exact:
+        for part_path in part_paths[AUTHOR_EXACT]:
+            exact = pd.concat([exact, load_part(part_path)], ignore_index=True).drop_duplicates()
+    return registers, exact
+
+def main(context):
+    import numpy as np
+    from sketches import hll_estimate, hll_merge
+
+    compare_exact = context.option('compare_exact', False)
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Sketching distinct authors per category-month (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)
+        registers, exact = merge_partials(part_paths, compare_exact)
+        registers = with_rollup_keys(registers)
+        month_estimate = hll_estimate(registers, ['month', 'category'])
+        year_registers = hll_merge([registers[['year', 'major_category', 'register', 'rank']]], ['year', 'major_category'])
+        year_estimate = hll_estimate(year_registers, ['year', 'major_category'])
+
+        os.makedirs('cleaning/asset', exist_ok=True)
+        for estimate, path in [(month_estimate, MONTH_OUTPUT_PATH), (year_estimate, YEAR_OUTPUT_PATH)]:
+            estimate.round().astype(np.int64).rename('distinct_authors').reset_index().to_csv(path, index=False)
+            print(f"Saved to {path}")
+
+        if compare_exact:
+            exact = with_rollup_keys(exact)
+            report_error(month_estimate, exact.groupby(['month', 'category'])['author'].nunique(), "category-month")
+            report_error(year_estimate, exact.groupby(['year', 'major_category'])['author'].nunique(), "major category-year")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
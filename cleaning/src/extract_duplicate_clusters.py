@@ -0,0 +1,39 @@
+"""
+Finds near-duplicate papers (cross-listed or re-submitted copies) by title and abstract with
+MinHash LSH (see minhash.py) and saves cleaning/asset/duplicate_clusters.csv: one row per paper
+in a cluster, with the cluster's representative id and the estimated Jaccard similarity to it,
+and cleaning/asset/duplicate_clusters.json: the input the clusters were found in.
+
+The count scripts accept --collapse-duplicates to count each cluster once; they refuse clusters
+found in another input.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import sys
+
+from context import Context
+
+MINHASH = 'minhash'
+
+def block_stages(context):
+    from minhash import minhash_partial
+    return {MINHASH: minhash_partial}
+
+def main(context):
+    from minhash import DUPLICATE_CLUSTERS_PATH, duplicate_clusters, save_clusters
+
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Computing MinHash signatures (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)[MINHASH]
+        clusters = duplicate_clusters(part_paths)
+        print(f"{clusters['cluster'].nunique()} duplicate clusters covering {len(clusters)} papers")
+        save_clusters(clusters, context.data_path)
+        print(f"Saved to {DUPLICATE_CLUSTERS_PATH}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
@@ -1,65 +1,58 @@
 """
 Extracts major category-month counts from arxiv-metadata JSON and saves to cleaning/asset/major_category_month_counts.csv
 
+Also writes the primary-only and fractional counting modes next to it, under the same name with
+_primary and _fractional suffixes (see context.COUNTINGS).
+
 Source data: arXiv metadata snapshot
 Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
 """
-import dask.dataframe as dd
-import pandas as pd
-from tqdm import tqdm
+import sys
 import os
 
-DATA_PATH = 'data/arxiv-metadata-oai-snapshot.json'
+from context import COUNTINGS, Context, add_count_arguments, counting_path
+
 OUTPUT_PATH = 'cleaning/asset/major_category_month_counts.csv'
 
-def map_major_category(cat):
-    if isinstance(cat, str):
-        if cat.startswith('cs'): return 'Computer Science'
-        elif cat.startswith('econ'): return 'Economics'
-        elif cat.startswith('eess'): return 'Electrical Engineering and Systems Science'
-        elif cat.startswith('math'): return 'Mathematics'
-        elif cat.startswith('physics'): return 'Physics'
-        elif cat.startswith('q-bio'): return 'Quantitative Biology'
-        elif cat.startswith('q-fin'): return 'Quantitative Finance'
-        elif cat.startswith('stat'): return 'Statistics'
-        else: return 'Other'
-    return 'Other'
+def add_arguments(parser):
+    add_count_arguments(parser)
+
+def block_stages(context):
+    return context.category_month_stages()
+
+def main(context):
+    from tqdm import tqdm
+    from aggregates import COUNT_COLUMNS, counting_table, map_major_category
+    from sampling import estimate_totals, preview_path
 
-def main():
-    print(f"Loading {DATA_PATH} ...")
+    print(f"Loading {context.data_path} ...")
     try:
-        dtypes = {
-            'id': 'object',
-            'submitter': 'object',
-            'authors': 'object',
-            'title': 'object',
-            'comments': 'object',
-            'journal-ref': 'object',
-            'doi': 'object',
-            'report-no': 'object',
-            'categories': 'object',
-            'license': 'object',
-            'abstract': 'object',
-            'versions': 'object',
-            'update_date': 'object',
-            'authors_parsed': 'object'
-        }
-        ddf = dd.read_json(DATA_PATH, lines=True, blocksize="64MB", dtype=dtypes)
-        ddf['month'] = ddf['update_date'].str[:7]
-        ddf['categories_list'] = ddf['categories'].str.split()
-        ddf_exploded = ddf.explode('categories_list')
-        print("Computing major category-month counts (this may take a while)...")
-        cat_month_counts = ddf_exploded.groupby(['month', 'categories_list']).size().compute().reset_index(name='count')
-        cat_month_counts['major_category'] = cat_month_counts['categories_list'].apply(map_major_category)
-        major_cat_month_counts = cat_month_counts.groupby(['month', 'major_category'])['count'].sum().reset_index()
+        sample = context.option('sample')
+        if sample:
+            print(f"Estimating from a {sample:.1%} byte-range sample...")
+            units = context.sampled_category_month_units(context.data_path)
+            units['major_category'] = units['categories_list'].apply(map_major_category)
+            tables = {counting: estimate_totals(units, ['month', 'major_category'], COUNT_COLUMNS[counting]) for counting in COUNTINGS}
+            output_path = preview_path(OUTPUT_PATH)
+        else:
+            print("Computing major category-month counts (this may take a while)...")
+            cat_month_counts = context.category_month_counts(context.data_path)
+            cat_month_counts['major_category'] = cat_month_counts['categories_list'].apply(map_major_category)
+            major_cat_month_counts = cat_month_counts.groupby(['month', 'major_category'])[list(COUNT_COLUMNS.values())].sum().reset_index()
+            tables = {counting: counting_table(major_cat_month_counts, ['month', 'major_category'], counting) for counting in COUNTINGS}
+            output_path = OUTPUT_PATH
         print("Writing CSV with progress bar...")
         os.makedirs('cleaning/asset', exist_ok=True)
-        with tqdm(total=len(major_cat_month_counts), desc="Saving rows") as pbar:
-            major_cat_month_counts.to_csv(OUTPUT_PATH, index=False)
-            pbar.update(len(major_cat_month_counts))
-        print(f"Saved to {OUTPUT_PATH}")
+        # Progress bar for writing CSV
+        with tqdm(total=sum(len(table) for table in tables.values()), desc="Saving rows") as pbar:
+            for counting, table in tables.items():
+                table.to_csv(counting_path(output_path, counting), index=False)
+                pbar.update(len(table))
+        for counting in COUNTINGS:
+            print(f"Saved to {counting_path(output_path, counting)}")
     except Exception as e:
         print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    main(Context.from_command_line(__doc__, add_arguments))
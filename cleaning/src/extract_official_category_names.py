@@ -7,6 +7,8 @@ Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
 import json
 import os
 
+from context import Context
+
 output_path = 'cleaning/asset/official_category_names.json'
 
 official_category_names = {
@@ -141,7 +143,7 @@ def extract_official_category_names():
     except Exception as e:
         print(f"Error saving official category names: {e}")
 
-def main():
+def main(context):
     print("Writing JSON with progress bar...")
     os.makedirs('cleaning/asset', exist_ok=True)
     from tqdm import tqdm
@@ -156,4 +158,4 @@ def main():
     print(f"Saved to {output_path}")
 
 if __name__ == "__main__":
-    main()
+    main(Context.from_command_line(__doc__))
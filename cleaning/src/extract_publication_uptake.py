@@ -0,0 +1,44 @@
+"""
+Extracts journal uptake and publication lag from journal-ref and doi (see publication.py) and saves:
+- cleaning/asset/journal_uptake_category_year.csv: papers, papers with a journal reference, with a
+  DOI, published (either), and uptake_rate (published / papers)
+- cleaning/asset/publication_lag_category_year.csv: papers per publication lag in years
+
+Both are per category and submission year.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+UPTAKE_OUTPUT_PATH = 'cleaning/asset/journal_uptake_category_year.csv'
+LAG_OUTPUT_PATH = 'cleaning/asset/publication_lag_category_year.csv'
+
+def block_stages(context):
+    from publication import PUBLICATION, publication_partial
+    return {PUBLICATION: publication_partial}
+
+def main(context):
+    from aggregates import merge_counts
+    from publication import PUBLICATION, merge_uptake
+
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Computing journal uptake per category and year (this may take a while)...")
+        partials = context.run_stages(block_stages(context), context.data_path)
+        uptake = merge_uptake([p['uptake'] for p in partials[PUBLICATION]])
+        uptake['uptake_rate'] = (uptake['published'] / uptake['papers']).round(4)
+        lag = merge_counts([p['lag'] for p in partials[PUBLICATION]], ['category', 'year', 'lag_years'])
+        os.makedirs('cleaning/asset', exist_ok=True)
+        for table, path in [(uptake, UPTAKE_OUTPUT_PATH), (lag, LAG_OUTPUT_PATH)]:
+            table.to_csv(path, index=False)
+            print(f"Saved to {path}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
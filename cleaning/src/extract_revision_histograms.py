@@ -0,0 +1,42 @@
+"""
+Extracts revision-history histograms from the versions field (see revisions.py) and saves:
+- cleaning/asset/revision_versions_category_year.csv: papers per version count
+- cleaning/asset/revision_lag_category_year.csv: revised papers per v1-to-latest-version lag bin
+
+Both are per category and submission year.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+VERSIONS_OUTPUT_PATH = 'cleaning/asset/revision_versions_category_year.csv'
+LAG_OUTPUT_PATH = 'cleaning/asset/revision_lag_category_year.csv'
+
+def block_stages(context):
+    from revisions import REVISIONS, revision_partial
+    return {REVISIONS: revision_partial}
+
+def main(context):
+    from aggregates import merge_counts
+    from revisions import REVISIONS, lag_table
+
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Computing revision histograms per category and year (this may take a while)...")
+        partials = context.run_stages(block_stages(context), context.data_path)
+        versions = merge_counts([p['versions'] for p in partials[REVISIONS]], ['category', 'year', 'versions'])
+        lag = lag_table(merge_counts([p['lag'] for p in partials[REVISIONS]], ['category', 'year', 'lag_bin']))
+        os.makedirs('cleaning/asset', exist_ok=True)
+        for table, path in [(versions, VERSIONS_OUTPUT_PATH), (lag, LAG_OUTPUT_PATH)]:
+            table.to_csv(path, index=False)
+            print(f"Saved to {path}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__))
@@ -0,0 +1,99 @@
+"""
+Extracts per-category keyword frequencies by month from titles and abstracts and saves:
+- cleaning/asset/term_trends.npz: hashed term counts per (month, category)
+- cleaning/asset/top_terms_by_category_year.csv: top TOP_K terms per category and year
+
+Tokens are feature-hashed into N_FEATURES buckets, so every (category, month) is a count vector of
+fixed length and memory stays bounded however large the vocabulary grows. Vectors are kept sparse
+(month, category, bucket, count). Each bucket also remembers its most frequent term, used to
+label it in the report; with 2**18 buckets collisions between frequent terms are rare.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+TREND_PATH = 'cleaning/asset/term_trends.npz'
+REPORT_PATH = 'cleaning/asset/top_terms_by_category_year.csv'
+TERM_TRENDS = 'term_trends'
+N_FEATURES = 2**18
+TOP_K = 10
+
+def term_trend_partial(pdf):
+    """Hashed term counts per (month, category) for one block, plus the top term of each bucket."""
+    import numpy as np
+    import pandas as pd
+    from sketches import hash64
+    from text_index import tokenize
+
+    texts = pdf['title'].fillna('') + ' ' + pdf['abstract'].fillna('')
+    texts.index = np.arange(len(pdf))
+    tokens = tokenize(texts)
+    buckets = hash64(tokens.to_numpy(dtype=object)) % np.uint64(N_FEATURES)
+    doc_terms = pd.DataFrame({'doc': tokens.index.to_numpy(dtype=np.int64), 'bucket': buckets.astype(np.int64)})
+    doc_groups = pd.DataFrame({
+        'month': pdf['update_date'].str[:7].to_numpy(),
+        'category': pdf['categories'].str.split().to_numpy()
+    }).explode('category')
+    doc_groups['doc'] = doc_groups.index.to_numpy(dtype=np.int64)
+    doc_bucket_counts = doc_terms.groupby(['doc', 'bucket']).size().rename('count').reset_index()
+    counts = doc_groups.merge(doc_bucket_counts, on='doc').groupby(['month', 'category', 'bucket'])['count'].sum()
+    term_counts = pd.DataFrame({'bucket': buckets.astype(np.int64), 'term': tokens.to_numpy()}).value_counts()
+    term_counts = term_counts.rename('count').reset_index().drop_duplicates('bucket')
+    return {'counts': counts.reset_index(), 'terms': term_counts}
+
+def add_arguments(parser):
+    parser.add_argument('--top-k', type=int, default=TOP_K, help="terms per category and year in the report")
+
+def block_stages(context):
+    return {TERM_TRENDS: term_trend_partial}
+
+def main(context):
+    import numpy as np
+    import pandas as pd
+    from aggregates import merge_counts
+    from checkpoint import load_part
+
+    top_k = context.option('top_k', TOP_K)
+    print(f"Loading {context.data_path} ...")
+    try:
+        print("Computing hashed term counts per category and month (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)[TERM_TRENDS]
+        # Fold the blocks in one at a time, so only the running totals and one block are in memory
+        counts = terms = None
+        for part_path in part_paths:
+            part = load_part(part_path)
+            counts = merge_counts([counts, part['counts']], ['month', 'category', 'bucket'])
+            terms = merge_counts([terms, part['terms']], ['bucket', 'term'])
+        terms = terms.sort_values('count', ascending=False).drop_duplicates('bucket')
+
+        month_codes, months = pd.factorize(counts['month'], sort=True)
+        category_codes, categories = pd.factorize(counts['category'], sort=True)
+        os.makedirs('cleaning/asset', exist_ok=True)
+        np.savez_compressed(
+            TREND_PATH, n_features=N_FEATURES,
+            months=np.asarray(months, dtype=str), categories=np.asarray(categories, dtype=str),
+            month=month_codes.astype(np.uint16), category=category_codes.astype(np.uint16),
+            bucket=counts['bucket'].to_numpy(np.uint32), count=counts['count'].to_numpy(np.uint32),
+            term_bucket=terms['bucket'].to_numpy(np.uint32), term=terms['term'].to_numpy(dtype=str))
+        print(f"Saved to {TREND_PATH}")
+
+        print("Writing top terms per category and year...")
+        counts['year'] = counts['month'].str[:4]
+        yearly = counts.groupby(['category', 'year', 'bucket'])['count'].sum().reset_index()
+        yearly['share'] = yearly['count'] / yearly.groupby(['category', 'year'])['count'].transform('sum')
+        yearly = yearly.sort_values(['category', 'year', 'count'], ascending=[True, True, False])
+        yearly['rank'] = yearly.groupby(['category', 'year']).cumcount() + 1
+        report = yearly[yearly['rank'] <= top_k].merge(terms[['bucket', 'term']], on='bucket', how='left')
+        report = report[['category', 'year', 'rank', 'term', 'count', 'share']]
+        report.to_csv(REPORT_PATH, index=False)
+        print(f"Saved to {REPORT_PATH}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
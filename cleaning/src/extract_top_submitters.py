@@ -0,0 +1,97 @@
+"""
+Finds the top submitters and most prolific authors per major category and year and saves:
+- cleaning/asset/top_submitters_by_category_year.csv
+- cleaning/asset/top_authors_by_category_year.csv
+
+Each block keeps a SpaceSaving summary (the CAPACITY most frequent names per group) and a Count-Min
+sketch per (year, major category); the blocks are read back one at a time and folded into running
+summaries, so no exact dictionary over all names is ever built. The reported count is the smaller of the two upper bounds; lower_bound is the
+guaranteed minimum. A paper counts once per major category it is listed in.
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import os
+import sys
+
+from context import Context
+
+SUBMITTER_OUTPUT_PATH = 'cleaning/asset/top_submitters_by_category_year.csv'
+AUTHOR_OUTPUT_PATH = 'cleaning/asset/top_authors_by_category_year.csv'
+HEAVY_HITTERS = 'heavy_hitters'
+KEYS = ['major_category', 'year']
+CAPACITY = 200  # SpaceSaving counters per group; --top-names can be at most this
+TOP_K = 10
+
+def paper_groups(pdf):
+    """One row per (paper position, year, major category)."""
+    import pandas as pd
+    from aggregates import map_major_category, paper_categories
+    cats = paper_categories(pdf)
+    groups = pd.DataFrame({'year': cats['month'].str[:4], 'major_category': cats['category'].map(map_major_category)},
+                          index=cats.index)
+    return groups.reset_index().drop_duplicates().set_index('index')[KEYS]
+
+def heavy_hitter_partial(pdf):
+    from aggregates import paper_authors
+    from sketches import cms_table, spacesaving_summary
+    groups = paper_groups(pdf)
+    submitters = groups.join(pdf['submitter'].reset_index(drop=True).str.strip().rename('item'), how='inner').dropna()
+    authors = groups.join(paper_authors(pdf).rename('item'), how='inner')
+    result = {}
+    for name, rows in [('submitters', submitters), ('authors', authors)]:
+        result[name] = spacesaving_summary(rows[KEYS], rows['item'].to_numpy(), CAPACITY)
+        result[f'{name}_cms'] = cms_table(rows[KEYS], rows['item'].to_numpy())
+    return result
+
+def merge_partials(part_paths):
+    """Fold the blocks' summaries and sketches into one (summary, cms) per name, reading one block at a time."""
+    from checkpoint import load_part
+    from sketches import cms_merge, spacesaving_merge
+    merged = {}
+    for part_path in part_paths:
+        part = load_part(part_path)
+        for name in ('submitters', 'authors'):
+            summary, cms = part[name], part[f'{name}_cms']
+            if name in merged:
+                summary = spacesaving_merge(merged[name][0], summary, KEYS, CAPACITY)
+                cms = cms_merge([merged[name][1], cms], KEYS)
+            merged[name] = summary, cms
+    return merged
+
+def top_k_table(summary, cms, name, k):
+    import numpy as np
+    from sketches import cms_query
+    summary = summary.copy()
+    summary['count_estimate'] = np.minimum(summary['count'], cms_query(cms, summary[KEYS], summary['item'].to_numpy()))
+    summary['lower_bound'] = (summary['count'] - summary['error']).clip(lower=0)
+    summary = summary.sort_values(KEYS + ['count_estimate'], ascending=[True, True, False])
+    summary['rank'] = summary.groupby(KEYS).cumcount() + 1
+    summary = summary[summary['rank'] <= k].rename(columns={'item': name[:-1]})
+    return summary[KEYS + ['rank', name[:-1], 'count_estimate', 'lower_bound']].astype({'count_estimate': np.int64})
+
+def add_arguments(parser):
+    parser.add_argument('--top-names', type=int, default=TOP_K, help=f"names per major category and year (max {CAPACITY})")
+
+def block_stages(context):
+    return {HEAVY_HITTERS: heavy_hitter_partial}
+
+def main(context):
+    top_names = context.option('top_names', TOP_K)
+    print(f"Loading {context.data_path} ...")
+    try:
+        if not 0 < top_names <= CAPACITY:
+            raise ValueError(f"--top-names must be between 1 and {CAPACITY}")
+        print("Sketching submitters and authors per major category and year (this may take a while)...")
+        part_paths = context.run_stages(block_stages(context), context.data_path, load=False)[HEAVY_HITTERS]
+        merged = merge_partials(part_paths)
+        os.makedirs('cleaning/asset', exist_ok=True)
+        for name, path in [('submitters', SUBMITTER_OUTPUT_PATH), ('authors', AUTHOR_OUTPUT_PATH)]:
+            top_k_table(*merged[name], name, top_names).to_csv(path, index=False)
+            print(f"Saved to {path}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
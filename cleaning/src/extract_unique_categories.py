@@ -4,41 +4,30 @@ Extracts unique categories from arxiv-metadata JSON and saves to cleaning/asset/
 Source data: arXiv metadata snapshot
 Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
 """
-import dask.dataframe as dd
 import json
-from tqdm import tqdm
+import sys
 import os
 
-DATA_PATH = 'data/arxiv-metadata-oai-snapshot.json'
+from context import Context
+
 OUTPUT_PATH = 'cleaning/asset/unique_categories.json'
 
-def main():
-    print(f"Loading {DATA_PATH} ...")
+def block_stages(context):
+    from aggregates import CATEGORY_MONTH, category_month_partial
+    return {CATEGORY_MONTH: category_month_partial}
+
+def main(context):
+    from tqdm import tqdm
+    from aggregates import CATEGORY_MONTH
+
+    print(f"Loading {context.data_path} ...")
     try:
-        dtypes = {
-            'id': 'object',
-            'submitter': 'object',
-            'authors': 'object',
-            'title': 'object',
-            'comments': 'object',
-            'journal-ref': 'object',
-            'doi': 'object',
-            'report-no': 'object',
-            'categories': 'object',
-            'license': 'object',
-            'abstract': 'object',
-            'versions': 'object',
-            'update_date': 'object',
-            'authors_parsed': 'object'
-        }
-        ddf = dd.read_json(DATA_PATH, lines=True, blocksize="64MB", dtype=dtypes)
-        ddf['categories_list'] = ddf['categories'].str.split()
         print("Extracting unique categories with progress bar...")
         unique_categories = set()
-        cats_list = ddf['categories_list'].compute()
-        for cats in tqdm(cats_list, desc="Processing rows"):
-            if isinstance(cats, list):
-                unique_categories.update(cats)
+        # Reuses the category-month block checkpoints shared with the count scripts
+        partials = context.run_stages(block_stages(context), context.data_path, share=[CATEGORY_MONTH])
+        for partial in tqdm(partials[CATEGORY_MONTH], desc="Processing blocks"):
+            unique_categories.update(partial['categories_list'].dropna())
         unique_categories_list = sorted(unique_categories)
         print("Writing JSON with progress bar...")
         os.makedirs('cleaning/asset', exist_ok=True)
@@ -49,6 +38,7 @@ def main():
         print(f"Saved to {OUTPUT_PATH}")
     except Exception as e:
         print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    main(Context.from_command_line(__doc__))
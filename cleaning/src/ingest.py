@@ -0,0 +1,350 @@
+"""
+Shared ingestion helpers for the cleaning scripts.
+
+Splits the arxiv-metadata JSON snapshot into newline-aligned byte blocks and parses each
+block into a pandas DataFrame. Malformed lines are quarantined to a side file instead of
+failing the whole block.
+
+The snapshot may also be compressed (.gz, .bz2, .zst). Files made of many independently
+compressed members -- BGZF gzip (bgzip), concatenated bz2 streams (pbzip2) and multi-frame
+zstd (pzstd, seekable zstd) -- are split at member boundaries and decompressed in parallel.
+Other compressed files are decompressed as one serial stream; their blocks are still
+parsed in parallel.
+
+The input may also be sharded: a directory or glob of snapshot files (e.g. the shards of an
+OAI-PMH harvest), each compressed or not. shard_paths lists them; every shard is split into
+blocks of its own and checkpointed under its own fingerprint (see checkpoint.py).
+
+Source data: arXiv metadata snapshot
+Homepage: https://www.kaggle.com/datasets/Cornell-University/arxiv
+"""
+import bz2
+import functools
+import glob
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # only needed for .zst snapshots
+    zstandard = None
+
+BLOCKSIZE = 64 * 2**20  # 64MB, same as the former dd.read_json(blocksize="64MB")
+# Assumed decompressed/compressed size ratio, used to size blocks of compressed members
+COMPRESSION_RATIO = 4
+
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}
+# Files of a shard directory that are read, once a compression extension is stripped
+SHARD_EXTENSIONS = ('.json', '.jsonl')
+
+
+def compression_of(path):
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1])
+
+
+def _is_shard(path):
+    root, ext = os.path.splitext(path)
+    if ext in COMPRESSION_EXTENSIONS:
+        ext = os.path.splitext(root)[1]
+    return ext in SHARD_EXTENSIONS
+
+
+def shard_paths(path):
+    """
+    Input files of path, in a stable order: [path] for a file, the .json/.jsonl files
+    (compressed or not) anywhere under a directory, or the files matching a glob pattern.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        paths = [p for p in paths if _is_shard(p)]
+    else:
+        paths = [p for p in glob.glob(path, recursive=True) if os.path.isfile(p)]
+    if not paths:
+        raise FileNotFoundError(f"No input files found at {path}")
+    return sorted(paths)
+
+
+def resolve_data_path(path):
+    """Return path, or its first existing compressed variant (path.gz, path.zst, path.bz2)."""
+    if os.path.exists(path):
+        return path
+    for ext in ('.gz', '.zst', '.bz2'):
+        if os.path.exists(path + ext):
+            return path + ext
+    return path
+
+
+DATA_PATH = resolve_data_path('data/arxiv-metadata-oai-snapshot.json')
+
+DTYPES = {
+    'id': 'object',
+    'submitter': 'object',
+    'authors': 'object',
+    'title': 'object',
+    'comments': 'object',
+    'journal-ref': 'object',
+    'doi': 'object',
+    'report-no': 'object',
+    'categories': 'object',
+    'license': 'object',
+    'abstract': 'object',
+    'versions': 'object',
+    'update_date': 'object',
+    'authors_parsed': 'object'
+}
+
+
+def block_ranges(path, blocksize=BLOCKSIZE):
+    """Return (start, end) byte ranges covering the file in blocksize steps."""
+    size = os.path.getsize(path)
+    return [(start, min(start + blocksize, size)) for start in range(0, size, blocksize)]
+
+
+def read_range(path, start, end):
+    """Return the complete lines of path whose first byte lies in [start, end)."""
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Skip the tail of a line owned by the previous block
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        if pos >= end:
+            return b''
+        data = f.read(end - pos)
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    return data
+
+
+def _zstd():
+    if zstandard is None:
+        raise ImportError("Reading .zst snapshots requires the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def _decompressor(compression):
+    if compression == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if compression == 'bz2':
+        return bz2.BZ2Decompressor()
+    return _zstd().ZstdDecompressor().decompressobj()
+
+
+def decompress_member(compression, data):
+    """Decompress one complete gzip member / bz2 stream / zstd frame."""
+    decompressor = _decompressor(compression)
+    out = decompressor.decompress(data)
+    if compression == 'zstd':
+        out += decompressor.flush()
+    if not decompressor.eof:
+        raise ValueError(f"Truncated {compression} member")
+    return out
+
+
+def _gzip_members(path):
+    """Member (offset, length) pairs of a BGZF file, or None for plain gzip."""
+    members = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset < size:
+            f.seek(offset)
+            header = f.read(18)
+            # BGZF: FEXTRA set, first extra subfield 'BC' holds the member size - 1
+            if (len(header) < 18 or header[:4] != b'\x1f\x8b\x08\x04'
+                    or header[12:14] != b'BC' or struct.unpack('<H', header[14:16])[0] != 2):
+                return None
+            length = struct.unpack('<H', header[16:18])[0] + 1
+            members.append((offset, length))
+            offset += length
+    return members
+
+
+def _zstd_members(path):
+    """Data frame (offset, length) pairs of a zstd file (skippable frames are left out)."""
+    members = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset < size:
+            f.seek(offset)
+            magic = struct.unpack('<I', f.read(4))[0]
+            if magic & 0xFFFFFFF0 == 0x184D2A50:
+                offset += 8 + struct.unpack('<I', f.read(4))[0]
+                continue
+            if magic != 0xFD2FB528:
+                raise ValueError(f"{path}: bad zstd frame at byte {offset}")
+            descriptor = f.read(1)[0]
+            single_segment = descriptor >> 5 & 1
+            fcs_size = {0: single_segment, 1: 2, 2: 4, 3: 8}[descriptor >> 6]
+            header_size = 5 + (not single_segment) + (0, 1, 2, 4)[descriptor & 3] + fcs_size
+            pos = offset + header_size
+            while True:
+                f.seek(pos)
+                block_header = int.from_bytes(f.read(3), 'little')
+                block_type = block_header >> 1 & 3
+                pos += 3 + (1 if block_type == 1 else block_header >> 3)
+                if block_header & 1:
+                    break
+            if descriptor >> 2 & 1:
+                pos += 4  # content checksum
+            members.append((offset, pos - offset))
+            offset = pos
+    return members
+
+
+def _bz2_members(path):
+    """Stream (offset, length) pairs of a file of concatenated bz2 streams (pbzip2)."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        starts = []
+        pos = mm.find(b'BZh')
+        while pos >= 0:
+            # Stream header 'BZh1'-'BZh9' followed by the first block magic (pi)
+            if mm[pos + 3:pos + 4].isdigit() and mm[pos + 4:pos + 10] == b'1AY&SY':
+                starts.append(pos)
+            pos = mm.find(b'BZh', pos + 1)
+        size = len(mm)
+    if not starts or starts[0] != 0:
+        return None
+    return [(start, end - start) for start, end in zip(starts, starts[1:] + [size])]
+
+
+def compressed_members(path, compression):
+    """Independently decompressible members of path, or None if it must be read serially."""
+    scan = {'gzip': _gzip_members, 'bz2': _bz2_members, 'zstd': _zstd_members}[compression]
+    members = scan(path)
+    if not members or len(members) < 2:
+        return None
+    return np.array(members, dtype=np.int64)
+
+
+def read_members(path, compression, members, lo, hi):
+    """
+    Return the complete lines whose first byte falls in the decompressed output of
+    members[lo:hi]; the last line is completed from the following members.
+    """
+    with open(path, 'rb') as f:
+        def member(k):
+            f.seek(members[k, 0])
+            return decompress_member(compression, f.read(members[k, 1]))
+
+        data = b''.join(member(k) for k in range(lo, hi))
+        prev = lo - 1
+        while prev >= 0 and not (last := member(prev)[-1:]):
+            prev -= 1  # empty members carry no line boundary
+        if prev >= 0 and last != b'\n':
+            # Skip the tail of a line owned by an earlier block
+            cut = data.find(b'\n')
+            data = data[cut + 1:] if cut >= 0 else b''
+        k = hi
+        while data and not data.endswith(b'\n') and k < len(members):
+            tail = member(k)
+            cut = tail.find(b'\n')
+            data += tail if cut < 0 else tail[:cut + 1]
+            k += 1
+    return data
+
+
+def open_stream(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    return _zstd().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+
+
+def _stream_blocks(path, compression, blocksize):
+    with io.BufferedReader(open_stream(path, compression)) as stream:
+        while True:
+            data = stream.read(blocksize)
+            if not data:
+                break
+            if not data.endswith(b'\n'):
+                data += stream.readline()
+            yield data
+
+
+def _constant(data):
+    return data
+
+
+def iter_blocks(path, blocksize=BLOCKSIZE):
+    """
+    Yield (index, fetch) for each newline-aligned block of path, where fetch() returns the
+    block's bytes. For uncompressed and splittable compressed files fetch reads lazily, so
+    it can run in a worker; serial streams are decompressed here, block by block.
+    """
+    compression = compression_of(path)
+    if compression is None:
+        for index, (start, end) in enumerate(block_ranges(path, blocksize)):
+            yield index, functools.partial(read_range, path, start, end)
+        return
+    members = compressed_members(path, compression)
+    if members is None:
+        for index, data in enumerate(_stream_blocks(path, compression, blocksize)):
+            yield index, functools.partial(_constant, data)
+        return
+    # Group consecutive members into blocks of about blocksize decompressed bytes
+    target = max(1, blocksize // COMPRESSION_RATIO)
+    group = np.cumsum(members[:, 1]) // target
+    bounds = np.flatnonzero(np.diff(group)) + 1
+    edges = [0] + bounds.tolist() + [len(members)]
+    for index, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+        yield index, functools.partial(read_members, path, compression, members, lo, hi)
+
+
+def empty_frame():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in DTYPES.items()})
+
+
+def parse_block(raw, quarantine_path=None):
+    """
+    Parse a block of JSON lines into a DataFrame with the snapshot columns.
+
+    The fast path hands the whole block to pandas. If that fails, the block is parsed line
+    by line and lines that are not valid JSON objects are appended to quarantine_path.
+    Either way the frame is reindexed to DTYPES, so a block whose records all lack a field
+    still has that column.
+    Returns (frame, number of quarantined lines).
+    """
+    if not raw.strip():
+        return empty_frame(), 0
+    try:
+        frame = pd.read_json(io.BytesIO(raw), lines=True, dtype=DTYPES)
+    except ValueError:
+        pass
+    else:
+        return frame.reindex(columns=list(DTYPES)).astype(DTYPES), 0
+    records = []
+    bad_lines = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            bad_lines.append(line)
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+        else:
+            bad_lines.append(line)
+    if bad_lines and quarantine_path:
+        os.makedirs(os.path.dirname(quarantine_path), exist_ok=True)
+        with open(quarantine_path, 'wb') as f:
+            f.write(b'\n'.join(bad_lines) + b'\n')
+    if not records:
+        return empty_frame(), len(bad_lines)
+    frame = pd.DataFrame.from_records(records)
+    frame = frame.reindex(columns=list(DTYPES)).astype(DTYPES)
+    return frame, len(bad_lines)
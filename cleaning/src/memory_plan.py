@@ -0,0 +1,111 @@
+"""
+Block size and worker count of the block engine (checkpoint.py) for a memory budget.
+
+A parsed block takes several times its raw bytes in memory (object-dtype columns: a Python
+object per field, lists of dicts for versions and authors_parsed), and parsing it briefly takes
+several times more, so the fixed 64MB blocks either leave a big host idle or run a small one out
+of memory. plan_blocks parses a few small sample blocks spread over the input under tracemalloc
+to measure both factors, then picks:
+
+- workers: every core, unless the budget cannot hold that many blocks of MIN_BLOCKSIZE;
+- blocksize: the largest power of two that fits workers in-flight blocks in the budget and
+  still gives every worker a block, capped at MAX_BLOCKSIZE (bigger blocks amortize the
+  per-block overhead; past the cap they only coarsen checkpoints). Powers of two keep the checkpoint fingerprint, which includes the block
+  size, stable when the budget changes a little;
+- blocks: the resulting number of blocks (partitions) of the input.
+
+An in-flight block holds its raw bytes plus the larger of the parsing peak and the parsed frame
+with the stages' working copies, estimated as STAGE_OVERHEAD times the frame.
+"""
+import math
+import os
+import tracemalloc
+
+import numpy as np
+
+from ingest import COMPRESSION_RATIO, block_ranges, compression_of, iter_blocks, parse_block, read_range, shard_paths
+
+SAMPLE_BLOCKS = 4
+SAMPLE_BYTES = 4 * 2**20
+MIN_BLOCKSIZE = 4 * 2**20
+MAX_BLOCKSIZE = 512 * 2**20
+STAGE_OVERHEAD = 1.5
+
+
+def _sample_blocks(path):
+    """Raw bytes of up to SAMPLE_BLOCKS blocks of SAMPLE_BYTES, spread over the shards of path."""
+    shards = shard_paths(path)
+    picked = [shards[int(i)] for i in np.linspace(0, len(shards) - 1, min(SAMPLE_BLOCKS, len(shards))).round()]
+    per_shard = max(1, SAMPLE_BLOCKS // len(picked))
+    for shard in picked:
+        if compression_of(shard) is None:
+            ranges = block_ranges(shard, SAMPLE_BYTES)
+            if not ranges:
+                continue
+            for i in np.unique(np.linspace(0, len(ranges) - 1, per_shard).round().astype(int)):
+                yield read_range(shard, *ranges[i])
+        else:
+            # Compressed shards are sampled from their start, so serial streams are not read through
+            for index, fetch in iter_blocks(shard, SAMPLE_BYTES):
+                if index == per_shard:
+                    break
+                yield fetch()
+
+
+def measure_expansion(path):
+    """In-memory size of a parsed block ('frame') and peak memory while parsing it ('peak'), per raw byte."""
+    raw_bytes = 0
+    frame_bytes = 0
+    peak = 0
+    for raw in _sample_blocks(path):
+        if not raw:
+            continue
+        tracemalloc.start()
+        try:
+            pdf, _ = parse_block(raw)
+            block_frame, block_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del pdf
+        raw_bytes += len(raw)
+        frame_bytes += block_frame
+        peak = max(peak, block_peak / len(raw))  # the worst block, peaks are not averaged
+    if not raw_bytes:
+        raise ValueError(f"Cannot measure the expansion factor: {path} has no data")
+    return {'frame': frame_bytes / raw_bytes, 'peak': peak}
+
+
+def input_bytes(path):
+    """Uncompressed size of the input, estimated with COMPRESSION_RATIO for compressed shards."""
+    return sum(os.path.getsize(shard) * (COMPRESSION_RATIO if compression_of(shard) else 1)
+               for shard in shard_paths(path))
+
+
+def plan_blocks(path, memory_budget, cpus=None):
+    """{'blocksize', 'workers', 'blocks', 'frame', 'peak', 'block_memory'} for a budget in bytes."""
+    expansion = measure_expansion(path)
+    per_raw_byte = 1 + max(expansion['peak'], expansion['frame'] * (1 + STAGE_OVERHEAD))
+    cpus = cpus or os.cpu_count() or 1
+    workers = max(1, min(cpus, int(memory_budget // (MIN_BLOCKSIZE * per_raw_byte))))
+    total = input_bytes(path)
+    # Largest block the budget allows, and no larger than it takes to give every worker a block
+    largest = min(memory_budget / (workers * per_raw_byte), total / workers)
+    blocksize = 2 ** int(math.floor(math.log2(max(largest, MIN_BLOCKSIZE))))
+    blocksize = min(blocksize, MAX_BLOCKSIZE)
+    return {
+        'blocksize': blocksize,
+        'workers': workers,
+        'blocks': max(1, math.ceil(total / blocksize)),
+        **expansion,
+        'block_memory': blocksize * per_raw_byte,
+    }
+
+
+def describe(plan, memory_budget):
+    text = (f"Memory plan for a {memory_budget / 2**20:.0f}MB budget: parsed blocks take {plan['frame']:.1f}x their "
+            f"raw size ({plan['peak']:.1f}x while parsing), so {plan['workers']} worker(s) x "
+            f"{plan['blocksize'] // 2**20}MB blocks (~{plan['block_memory'] / 2**20:.0f}MB each in flight), "
+            f"about {plan['blocks']} block(s)")
+    if plan['workers'] * plan['block_memory'] > memory_budget:
+        text += " -- the smallest plan, and still over the budget"
+    return text
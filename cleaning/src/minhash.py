@@ -0,0 +1,214 @@
+"""
+Near-duplicate paper detection with MinHash signatures and LSH banding.
+
+Each block computes, in parallel (minhash_partial, a checkpointed stage), a NUM_PERM-value
+MinHash signature of the word 3-gram shingles of every paper's title and abstract, and folds
+each of the BANDS bands of ROWS_PER_BAND signature values into one 32-bit band key.
+
+duplicate_clusters then finds candidate pairs -- papers sharing a band key in any band -- by
+sorting each band's keys, so no all-pairs comparison is made, keeps the pairs whose estimated
+Jaccard similarity (share of equal signature values) reaches SIMILARITY_THRESHOLD, and joins
+them into clusters with a union-find. A cluster's representative is its first paper in the
+snapshot.
+
+save_clusters records the input the clusters were found in next to them, and load_clusters
+refuses clusters of another input, or of an input that changed since.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import expand_categories, merge_counts
+from checkpoint import load_part
+from coauthor_graph import connected_components
+from ingest import shard_paths
+from sketches import hash64
+from text_index import tokenize
+
+DUPLICATE_CLUSTERS_PATH = 'cleaning/asset/duplicate_clusters.csv'
+DUPLICATE_CLUSTERS_INPUT_PATH = 'cleaning/asset/duplicate_clusters.json'
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 10  # shorter texts (e.g. withdrawn papers) get no signature
+SIMILARITY_THRESHOLD = 0.8
+MAX_BUCKET = 50  # band buckets with more papers are boilerplate, not duplicates
+_PERM_RNG = np.random.default_rng(20240101)
+PERM_A = _PERM_RNG.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+PERM_B = _PERM_RNG.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def shingles(texts):
+    """Word SHINGLE_SIZE-gram hashes per text, as a Series of uint64 indexed by text position."""
+    tokens = tokenize(texts)
+    docs = tokens.index.to_numpy()
+    words = tokens.to_numpy()
+    n = len(words) - SHINGLE_SIZE + 1
+    if n <= 0:
+        return pd.Series(np.zeros(0, dtype=np.uint64), index=docs[:0])
+    same_doc = docs[:n] == docs[SHINGLE_SIZE - 1:]
+    grams = words[:n].astype(object)
+    for k in range(1, SHINGLE_SIZE):
+        grams = grams + ' ' + words[k:n + k]
+    return pd.Series(hash64(grams[same_doc]), index=docs[:n][same_doc])
+
+
+def minhash_signatures(texts):
+    """(signatures, valid): uint32 MinHash signatures per text, and which texts have enough shingles."""
+    hashed = shingles(texts).reset_index().drop_duplicates()
+    hashed.columns = ['doc', 'hash']
+    counts = np.bincount(hashed['doc'].to_numpy(dtype=np.int64), minlength=len(texts))
+    valid = counts >= MIN_SHINGLES
+    signatures = np.full((len(texts), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if not len(hashed):
+        return signatures, valid
+    docs = hashed['doc'].to_numpy(dtype=np.int64)
+    values = hashed['hash'].to_numpy()
+    starts = np.flatnonzero(np.concatenate(([True], docs[1:] != docs[:-1])))
+    for i in range(NUM_PERM):
+        # Multiply-add with uint64 wraparound as the i-th hash permutation, keeping the high bits
+        permuted = ((values * PERM_A[i] + PERM_B[i]) >> np.uint64(32)).astype(np.uint32)
+        signatures[docs[starts], i] = np.minimum.reduceat(permuted, starts)
+    return signatures, valid
+
+
+def band_keys(signatures):
+    """One 32-bit key per band: the band's ROWS_PER_BAND signature values folded together."""
+    keys = np.zeros((len(signatures), BANDS), dtype=np.uint64)
+    for band in range(BANDS):
+        for value in signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].T:
+            keys[:, band] = (keys[:, band] ^ value.astype(np.uint64)) * MIX
+    return (keys >> np.uint64(32)).astype(np.uint32)
+
+
+def minhash_partial(pdf):
+    """Dedup stage: signatures, band keys and facets of one block's papers."""
+    texts = pdf['title'].fillna('') + ' ' + pdf['abstract'].fillna('')
+    texts.index = np.arange(len(pdf))
+    signatures, valid = minhash_signatures(texts)
+    return {
+        'ids': pdf['id'].astype(str).to_numpy(),
+        'months': pdf['update_date'].str[:7].to_numpy(),
+        'categories': pdf['categories'].to_numpy(),
+        'signatures': signatures,
+        'band_keys': band_keys(signatures),
+        'valid': valid,
+    }
+
+
+def candidate_pairs(keys, docs):
+    """(a, b) doc pairs sharing a key, from buckets of at most MAX_BUCKET docs."""
+    order = np.argsort(keys, kind='stable')
+    keys, docs = keys[order], docs[order]
+    _, bucket_start, bucket_size = np.unique(keys, return_index=True, return_counts=True)
+    size = np.repeat(bucket_size, bucket_size)
+    keep = (size >= 2) & (size <= MAX_BUCKET)
+    keys, docs = keys[keep], docs[keep]
+    pairs = []
+    for gap in range(1, MAX_BUCKET):
+        same = keys[gap:] == keys[:-gap]
+        if not same.any():
+            break
+        pairs.append(np.stack([docs[:-gap][same], docs[gap:][same]], axis=1))
+    return np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int64)
+
+
+def _gather(part_paths, docs, fields):
+    """Rows of fields for the sorted global doc ids docs, read one part at a time."""
+    gathered = {field: [] for field in fields}
+    offset = 0
+    for part_path in part_paths:
+        part = load_part(part_path)
+        n = len(part['ids'])
+        lo, hi = np.searchsorted(docs, [offset, offset + n])
+        for field in fields:
+            gathered[field].append(part[field][docs[lo:hi] - offset])
+        offset += n
+    return {field: np.concatenate(values) for field, values in gathered.items()}
+
+
+def duplicate_clusters(part_paths):
+    """Clusters of near-duplicate papers: one row per paper in a cluster of two or more."""
+    band_key_parts, valid_parts = [], []
+    for part_path in part_paths:
+        part = load_part(part_path)
+        band_key_parts.append(part['band_keys'])
+        valid_parts.append(part['valid'])
+    keys = np.concatenate(band_key_parts) if band_key_parts else np.zeros((0, BANDS), dtype=np.uint32)
+    valid = np.concatenate(valid_parts) if valid_parts else np.zeros(0, dtype=bool)
+    del band_key_parts
+    n_docs = len(valid)
+    docs = np.flatnonzero(valid)
+    pairs = np.unique(np.concatenate(
+        [candidate_pairs(keys[docs, band], docs) for band in range(BANDS)] + [np.zeros((0, 2), dtype=np.int64)]), axis=0)
+    del keys
+    print(f"{len(pairs)} candidate pairs among {len(docs)} papers")
+
+    candidates = np.unique(pairs)
+    signatures = _gather(part_paths, candidates, ['signatures'])['signatures']
+    a, b = np.searchsorted(candidates, pairs[:, 0]), np.searchsorted(candidates, pairs[:, 1])
+    similar = (signatures[a] == signatures[b]).mean(axis=1) >= SIMILARITY_THRESHOLD
+    pairs = pairs[similar]
+
+    roots = connected_components(n_docs, lambda: [(pairs[:, 0], pairs[:, 1])])
+    members = np.flatnonzero(np.bincount(roots, minlength=n_docs)[roots] >= 2)
+    rows = _gather(part_paths, members, ['ids', 'months', 'categories'])
+    representative = roots[members]
+    member_sig = signatures[np.searchsorted(candidates, members)]
+    representative_sig = signatures[np.searchsorted(candidates, representative)]
+    ids = pd.Series(rows['ids'], index=members)
+    return pd.DataFrame({
+        'cluster': ids[representative].to_numpy(),
+        'id': rows['ids'],
+        'month': rows['months'],
+        'categories': rows['categories'],
+        'similarity': (member_sig == representative_sig).mean(axis=1),
+    })
+
+
+def input_fingerprint(path):
+    """The input path and the path/size/mtime of each of its shards."""
+    shards = []
+    for shard in shard_paths(path):
+        stat = os.stat(shard)
+        shards.append([os.path.abspath(shard), stat.st_size, stat.st_mtime_ns])
+    return {'path': os.path.abspath(path), 'shards': shards}
+
+
+def save_clusters(clusters, path):
+    """Write the clusters found in the input path, and the fingerprint of that input."""
+    os.makedirs(os.path.dirname(DUPLICATE_CLUSTERS_PATH), exist_ok=True)
+    clusters.to_csv(DUPLICATE_CLUSTERS_PATH, index=False)
+    with open(DUPLICATE_CLUSTERS_INPUT_PATH, 'w') as f:
+        json.dump(input_fingerprint(path), f)
+
+
+def load_clusters(path):
+    """The clusters saved by extract_duplicate_clusters.py, checked to be those of the input path."""
+    if not os.path.exists(DUPLICATE_CLUSTERS_PATH) or not os.path.exists(DUPLICATE_CLUSTERS_INPUT_PATH):
+        raise ValueError(f"No duplicate clusters for {path}; run extract_duplicate_clusters.py first")
+    with open(DUPLICATE_CLUSTERS_INPUT_PATH, 'r') as f:
+        saved = json.load(f)
+    if os.path.abspath(path) != saved['path']:
+        raise ValueError(f"The duplicate clusters were found in {saved['path']}, not {path}; "
+                         f"rerun extract_duplicate_clusters.py")
+    if input_fingerprint(path) != saved:
+        raise ValueError(f"{path} changed since the duplicate clusters were found; rerun extract_duplicate_clusters.py")
+    return pd.read_csv(DUPLICATE_CLUSTERS_PATH, dtype=str)
+
+
+def collapse_duplicates(counts, clusters):
+    """Category-month counts with each duplicate cluster counted once, as its representative paper."""
+    keys = ['month', 'categories_list']
+    duplicates = clusters[clusters['id'] != clusters['cluster']]
+    removed = merge_counts([expand_categories(duplicates[['month', 'categories']].assign(count=1))], keys)
+    columns = [c for c in counts.columns if c in removed.columns and c not in keys]
+    collapsed = counts.merge(removed[keys + columns], on=keys, how='left', suffixes=('', '_removed'))
+    for column in columns:
+        removed_column = collapsed.pop(f'{column}_removed').fillna(0)
+        collapsed[column] = collapsed[column] - removed_column.astype(collapsed[column].dtype)
+    return collapsed[collapsed['count'] > 0].reset_index(drop=True)
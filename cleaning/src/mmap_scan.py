@@ -0,0 +1,83 @@
+"""
+Memory-mapped counting engine for the category-month counts.
+
+An alternative to the Dask block engine (checkpoint.py) for the uncompressed snapshot: the
+file is mmap'ed, cut into newline-aligned byte ranges, and each range is scanned by a
+worker process with a bytes regex running directly over the mapping (no copy, no JSON
+parsing). Only the "categories" and "update_date" fields are decoded. Each worker returns
+a small Counter of (month, categories string) pairs which the driver expands per category
+(aggregates.expand_categories, under every counting mode).
+
+A sharded input is scanned as one pool of ranges over all of its (uncompressed) shards; each
+worker maps a shard the first time it gets one of its ranges.
+
+JSON string values cannot contain an unescaped '"', so the field patterns cannot match
+inside titles or abstracts.
+"""
+import mmap
+import os
+import re
+from collections import Counter
+from multiprocessing import Pool
+
+import pandas as pd
+
+from aggregates import expand_categories, merge_counts
+from ingest import DATA_PATH, compression_of, shard_paths
+
+RECORD_PATTERN = re.compile(rb'"categories":\s*"([^"]*)".*?"update_date":\s*"(\d{4}-\d{2})')
+
+_maps = {}
+
+
+def newline_ranges(mm, n_ranges):
+    """Split a mapping into n_ranges (start, end) byte ranges that end just after a newline."""
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, n_ranges):
+        cut = mm.find(b'\n', max(bounds[-1], size * i // n_ranges))
+        if cut < 0:
+            break
+        bounds.append(cut + 1)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _mapping(path):
+    if path not in _maps:
+        f = open(path, 'rb')
+        _maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _maps[path]
+
+
+def _scan_range(task):
+    path, start, end = task
+    return Counter(m.groups() for m in RECORD_PATTERN.finditer(_mapping(path), start, end))
+
+
+def scan_category_months(path=DATA_PATH, processes=None):
+    """Return the category-month count table of path, same shape as aggregates.merge_counts."""
+    paths = shard_paths(path)
+    for shard in paths:
+        if compression_of(shard):
+            raise ValueError(f"The mmap engine needs an uncompressed snapshot, got {shard}")
+    processes = processes or os.cpu_count() or 1
+    sizes = [os.path.getsize(shard) for shard in paths]
+    tasks = []
+    for shard, size in zip(paths, sizes):
+        if not size:
+            continue  # empty files cannot be mapped
+        # About 4 ranges per process in total, split between the shards by size
+        n_ranges = max(1, round(processes * 4 * size / sum(sizes)))
+        with open(shard, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            tasks.extend((shard, start, end) for start, end in newline_ranges(mm, n_ranges))
+    pair_counts = Counter()
+    with Pool(processes) as pool:
+        for partial in pool.imap_unordered(_scan_range, tasks):
+            pair_counts.update(partial)
+
+    pairs = pd.DataFrame(list(pair_counts.keys()), columns=['categories', 'month'])
+    pairs['count'] = list(pair_counts.values())
+    pairs['month'] = pairs['month'].str.decode('ascii')
+    pairs['categories'] = pairs['categories'].str.decode('utf-8')
+    return merge_counts([expand_categories(pairs)], ['month', 'categories_list'])
@@ -0,0 +1,69 @@
+"""
+Journal uptake and publication lag from the `journal-ref` and `doi` fields, per category and
+submission year (the year of v1).
+
+A paper counts as published when it has a journal reference or a DOI. The publication year is
+extracted from the journal reference with vectorized regexes -- a parenthesized year such as
+"(2015)" if there is one, else the first standalone 19xx/20xx (later ones tend to be errata) --
+and the lag is that year minus the submission year, capped at LAG_CAP_YEARS; -1 means
+published before v1 was posted.
+
+Tables:
+- uptake: category, year, papers, journal_ref, doi, published (paper counts)
+- lag: category, year, lag_years, count; only papers with a publication year
+"""
+import numpy as np
+import pandas as pd
+
+from revisions import version_dates
+
+PUBLICATION = 'publication'
+LAG_CAP_YEARS = 5
+PAREN_YEAR = r'\(((?:19|20)\d{2})\)'
+FIRST_YEAR = r'(?<!\d)((?:19|20)\d{2})(?!\d)'
+
+
+def publication_years(journal_refs):
+    """Publication year of each journal reference (float, NaN if none is found)."""
+    years = journal_refs.str.extract(PAREN_YEAR, expand=False)
+    years = years.fillna(journal_refs.str.extract(FIRST_YEAR, expand=False))
+    return pd.to_numeric(years, errors='coerce')
+
+
+def publication_partial(pdf):
+    """Uptake counts and lag histogram per (category, year) for one block."""
+    journal_refs = pdf['journal-ref'].where(pdf['journal-ref'].str.strip().str.len() > 0)
+    has_journal_ref = journal_refs.notna().to_numpy()
+    has_doi = (pdf['doi'].str.strip().str.len() > 0).to_numpy()
+    year = version_dates(pdf['versions'], 0).dt.year.to_numpy()
+    lag = np.clip(publication_years(journal_refs).to_numpy() - year, -1, LAG_CAP_YEARS)
+    papers = pd.DataFrame({
+        'categories': pdf['categories'].to_numpy(),
+        'year': year,
+        'journal_ref': has_journal_ref.astype(np.int64),
+        'doi': has_doi.astype(np.int64),
+        'published': (has_journal_ref | has_doi).astype(np.int64),
+        'lag_years': lag,
+    })
+    papers = papers[papers['year'].notna()].astype({'year': np.int64})
+    # Sum per distinct categories string first, so only the (few) groups are split and exploded
+    uptake = papers.groupby(['categories', 'year']).agg(
+        papers=('published', 'size'), journal_ref=('journal_ref', 'sum'), doi=('doi', 'sum'),
+        published=('published', 'sum')).reset_index()
+    lag = papers.dropna(subset=['lag_years']).astype({'lag_years': np.int64})
+    lag = lag.groupby(['categories', 'year', 'lag_years']).size().reset_index(name='count')
+    return {
+        'uptake': _explode_categories(uptake, ['year'], ['papers', 'journal_ref', 'doi', 'published']),
+        'lag': _explode_categories(lag, ['year', 'lag_years'], ['count']),
+    }
+
+
+def _explode_categories(counts, keys, values):
+    counts['category'] = counts.pop('categories').str.split()
+    return counts.explode('category').groupby(['category'] + keys)[values].sum().reset_index()
+
+
+def merge_uptake(partials):
+    """Sum per-block uptake tables."""
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(['category', 'year'])[['papers', 'journal_ref', 'doi', 'published']].sum().reset_index()
@@ -0,0 +1,175 @@
+"""
+Byte-offset record index for the uncompressed arxiv-metadata JSON snapshot.
+
+The index is a NumPy structured array sorted by arXiv id (id, byte offset, line length, update
+month as YYYYMM) plus each record's category codes in CSR layout. A paper is then read with a
+binary search and one seek into the memory-mapped snapshot, and a category-month drilldown
+reads only the matching records instead of scanning the file.
+
+Layout of cleaning/index/:
+- records.npy: structured array (id, offset, length, month), sorted by id
+- record_cat_indptr.npy / record_cat_codes.npy: category codes per record (CSR layout)
+- records.json: category list that the codes index into, and the indexed file's path/size/mtime
+
+Usage:
+    python cleaning/src/record_index.py get 0704.0001
+    python cleaning/src/record_index.py drilldown cs.LG 2007-05 --limit 5
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+from multiprocessing import Pool
+
+import numpy as np
+
+from ingest import DATA_PATH, compression_of
+from mmap_scan import newline_ranges
+
+INDEX_DIR = 'cleaning/index'
+ID_WIDTH = 32
+RECORD_DTYPE = np.dtype([('id', f'S{ID_WIDTH}'), ('offset', np.int64), ('length', np.int32), ('month', np.int32)])
+# A record line starts with its id; categories and update_date follow on the same line
+LINE_PATTERN = re.compile(
+    rb'\{"id":\s*"([^"]*)"[^\n]*?"categories":\s*"([^"]*)"[^\n]*?"update_date":\s*"(\d{4})-(\d{2})[^\n]*')
+
+_mm = None
+
+
+def _open_worker(path):
+    global _mm
+    f = open(path, 'rb')
+    _mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_range(bounds):
+    start, end = bounds
+    ids, offsets, lengths, months, categories = [], [], [], [], []
+    for m in LINE_PATTERN.finditer(_mm, start, end):
+        ids.append(m.group(1))
+        offsets.append(m.start())
+        lengths.append(m.end() - m.start())
+        months.append(int(m.group(3)) * 100 + int(m.group(4)))
+        categories.append(m.group(2))
+    return ids, offsets, lengths, months, categories
+
+
+def build_record_index(path=DATA_PATH, index_dir=INDEX_DIR, processes=None):
+    if compression_of(path):
+        raise ValueError(f"Byte offsets need an uncompressed snapshot, got {path}")
+    processes = processes or os.cpu_count() or 1
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = newline_ranges(mm, processes * 4)
+    with Pool(processes, initializer=_open_worker, initargs=(path,)) as pool:
+        parts = pool.map(_scan_range, ranges)
+
+    records = np.zeros(sum(len(part[0]) for part in parts), dtype=RECORD_DTYPE)
+    pos = 0
+    for ids, offsets, lengths, months, _ in parts:
+        n = len(ids)
+        records['id'][pos:pos + n] = ids
+        records['offset'][pos:pos + n] = offsets
+        records['length'][pos:pos + n] = lengths
+        records['month'][pos:pos + n] = months
+        pos += n
+    category_strings = [cats for part in parts for cats in part[4]]
+
+    category_codes = {}
+    codes, lengths = [], []
+    for cats in category_strings:
+        split = cats.decode('utf-8').split()
+        codes.extend(category_codes.setdefault(cat, len(category_codes)) for cat in split)
+        lengths.append(len(split))
+    codes = np.array(codes, dtype=np.uint16)
+    lengths = np.array(lengths, dtype=np.int64)
+
+    order = np.argsort(records['id'], kind='stable')
+    starts = np.concatenate(([0], np.cumsum(lengths)))[:-1][order]
+    lengths = lengths[order]
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, 'records.npy'), records[order])
+    np.save(os.path.join(index_dir, 'record_cat_indptr.npy'), np.concatenate(([0], np.cumsum(lengths))))
+    np.save(os.path.join(index_dir, 'record_cat_codes.npy'), codes[positions])
+    stat = os.stat(path)
+    with open(os.path.join(index_dir, 'records.json'), 'w') as f:
+        json.dump({'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'categories': list(category_codes)}, f)
+    return len(records)
+
+
+class RecordIndex:
+    """
+    Lookups of raw snapshot records through the byte-offset index, in the snapshot it was built
+    from (path, by default the one recorded in the index).
+    """
+
+    def __init__(self, path=None, index_dir=INDEX_DIR):
+        with open(os.path.join(index_dir, 'records.json'), 'r') as f:
+            meta = json.load(f)
+        path = path or meta['path']
+        if os.path.abspath(path) != os.path.abspath(meta['path']):
+            raise ValueError(f"The record index was built from {meta['path']}, not {path}; rebuild it for {path}")
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (meta['size'], meta['mtime_ns']):
+            raise ValueError(f"{path} changed since the record index was built; rebuild it")
+        self.records = np.load(os.path.join(index_dir, 'records.npy'), mmap_mode='r')
+        self.cat_indptr = np.load(os.path.join(index_dir, 'record_cat_indptr.npy'), mmap_mode='r')
+        self.cat_codes = np.load(os.path.join(index_dir, 'record_cat_codes.npy'), mmap_mode='r')
+        self.categories = meta['categories']
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, row):
+        record = self.records[row]
+        return json.loads(self._mm[record['offset']:record['offset'] + record['length']])
+
+    def get(self, paper_id):
+        """The raw record of paper_id, or None."""
+        key = paper_id.encode('utf-8')
+        row = np.searchsorted(self.records['id'], key)
+        if row < len(self.records) and self.records['id'][row] == key:
+            return self._read(row)
+        return None
+
+    def drilldown(self, category, month):
+        """Raw records listed in category whose update_date falls in month (YYYY-MM), in file order."""
+        if category not in self.categories:
+            return []
+        rows = np.flatnonzero(self.records['month'] == int(month.replace('-', '')))
+        starts = self.cat_indptr[rows]
+        lengths = self.cat_indptr[rows + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        hit = self.cat_codes[positions] == self.categories.index(category)
+        rows = np.unique(np.repeat(rows, lengths)[hit])
+        rows = rows[np.argsort(self.records['offset'][rows])]
+        return [self._read(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up raw snapshot records through the byte-offset index")
+    parser.add_argument('--data', metavar='PATH', help="snapshot the index was built from (default: the one recorded in the index)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    get_parser = subparsers.add_parser('get', help="print one record by arXiv id")
+    get_parser.add_argument('paper_id')
+    drill_parser = subparsers.add_parser('drilldown', help="print the records of one category-month")
+    drill_parser.add_argument('category')
+    drill_parser.add_argument('month', help="YYYY-MM")
+    drill_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    index = RecordIndex(args.data)
+    if args.command == 'get':
+        record = index.get(args.paper_id)
+        print(json.dumps(record, indent=2) if record else f"{args.paper_id} not found")
+    else:
+        records = index.drilldown(args.category, args.month)
+        print(f"{len(records)} records in {args.category} {args.month}")
+        for record in records[:args.limit]:
+            print(f"{record['id']}\t{record['update_date']}\t{record['categories']}\t{record['title'][:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Revision-history histograms from the `versions` field: how many versions papers get and how long
+after v1 the latest version appears, per category and submission year (the year of v1).
+
+Each block is reduced to fixed-bin histograms -- version counts capped at VERSION_CAP, and the
+v1-to-latest lag binned by LAG_EDGES_DAYS -- with vectorized date parsing and no per-row Python,
+so the stage costs little on top of parsing the block. Block histograms have the same bins and
+are merged by summing counts (aggregates.merge_counts).
+
+Tables:
+- versions: category, year, versions (VERSION_CAP stands for VERSION_CAP or more), count
+- lag: category, year, lag_days_low, lag_days_high (empty for the open last bin), count;
+  only papers with more than one version
+"""
+import numpy as np
+import pandas as pd
+
+REVISIONS = 'revisions'
+VERSION_CAP = 10
+LAG_EDGES_DAYS = np.array([0, 1, 7, 30, 90, 180, 365, 730, 1825])  # lower bin edges; the last bin is open
+CREATED_FORMAT = '%d %b %Y %H:%M:%S GMT'  # 'created' after its 'Mon, ' weekday prefix
+
+
+def version_dates(versions, position):
+    """Creation dates of the version at position (0: v1, -1: latest) of each paper, NaT if missing."""
+    return pd.to_datetime(versions.str[position].str.get('created').str[5:], format=CREATED_FORMAT, errors='coerce')
+
+
+def revision_partial(pdf):
+    """Version-count and lag histograms per (category, year) for one block."""
+    versions = pdf['versions']
+    first, last = version_dates(versions, 0), version_dates(versions, -1)
+    n_versions = versions.str.len().fillna(0).to_numpy(np.int64)
+    lag_days = ((last - first).dt.total_seconds() / 86400).to_numpy()
+    lag_bin = np.searchsorted(LAG_EDGES_DAYS, lag_days, side='right') - 1
+    revised = (n_versions > 1) & np.isfinite(lag_days) & (lag_bin >= 0)
+    papers = pd.DataFrame({
+        'categories': pdf['categories'].to_numpy(),
+        'year': first.dt.year.to_numpy(),
+        'versions': np.minimum(n_versions, VERSION_CAP),
+        'lag_bin': np.where(revised, lag_bin, -1),
+    })
+    papers = papers[papers['year'].notna() & (papers['versions'] > 0)].astype({'year': np.int64})
+    return {
+        'versions': _per_category(papers, 'versions'),
+        'lag': _per_category(papers[papers['lag_bin'] >= 0], 'lag_bin'),
+    }
+
+
+def _per_category(papers, column):
+    # Count per distinct categories string first, so only the (few) groups are split and exploded
+    counts = papers.groupby(['categories', 'year', column]).size().reset_index(name='count')
+    counts['category'] = counts.pop('categories').str.split()
+    return counts.explode('category').groupby(['category', 'year', column])['count'].sum().reset_index()
+
+
+def lag_table(lag_counts):
+    """Replace lag_bin codes with their day ranges."""
+    bins = lag_counts.pop('lag_bin').to_numpy()
+    upper = np.append(LAG_EDGES_DAYS[1:], -1)[bins]
+    lag_counts.insert(2, 'lag_days_low', LAG_EDGES_DAYS[bins])
+    lag_counts.insert(3, 'lag_days_high', pd.Series(upper, index=lag_counts.index).where(upper >= 0).astype('Int64'))
+    return lag_counts
@@ -0,0 +1,113 @@
+"""
+Approximate category-month counts from a stratified sample of the snapshot's byte ranges.
+
+The uncompressed snapshot is cut into UNIT_SIZE byte units (a unit owns the lines whose first
+byte lies in it, as blocks do), consecutive units are grouped into strata, and
+UNITS_PER_STRATUM units are drawn at random from every stratum so that the sample covers the
+requested fraction of the file. The arXiv snapshot is roughly ordered by id, so stratifying by
+position spreads the sample over time. The units of a sharded input are numbered across its
+shards in order, so strata may span shard boundaries.
+
+Totals are estimated per stratum (stratum units x mean sampled unit count) and their variance
+from the spread between the sampled units of each stratum, with a finite-population correction;
+intervals use the t distribution, as each stratum only adds UNITS_PER_STRATUM - 1 degrees of
+freedom to the variance estimate. The estimator is linear, so any roll-up of the cells (by major category, year, ...) is estimated
+from the per-unit counts with estimate_totals, and its interval accounts for the correlation
+between cells read from the same units.
+
+Layout of cleaning/asset/preview/: the count CSVs under their usual names with stderr,
+count_low and count_high columns (95% intervals), plus category_month_units.csv, the per-unit
+counts that roll-ups are estimated from.
+"""
+import os
+
+import dask
+import numpy as np
+import pandas as pd
+
+from aggregates import COUNT_COLUMNS, category_month_partial
+from context import PREVIEW_DIR
+from ingest import compression_of, parse_block, read_range, shard_paths
+
+UNITS_PATH = os.path.join(PREVIEW_DIR, 'category_month_units.csv')
+UNIT_SIZE = 2**20
+UNITS_PER_STRATUM = 2
+Z = 1.96  # 97.5% normal quantile, for 95% intervals
+
+
+def preview_path(path):
+    """Where the sampled estimate of an output file goes."""
+    return os.path.join(PREVIEW_DIR, os.path.basename(path))
+
+
+def sample_design(sizes, fraction, seed=0, unit_size=UNIT_SIZE):
+    """Sampled units of files of the given sizes: (unit, stratum, stratum_units, sampled_units, shard, start, end) rows."""
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {fraction}")
+    sizes = np.asarray(sizes, dtype=np.int64)
+    shard_units = -(-sizes // unit_size)
+    n_units = max(1, int(shard_units.sum()))
+    n_strata = max(1, min(n_units, round(fraction * n_units / UNITS_PER_STRATUM)))
+    bounds = np.linspace(0, n_units, n_strata + 1).round().astype(np.int64)
+    rng = np.random.default_rng(seed)
+    rows = []
+    for stratum in range(n_strata):
+        units = np.arange(bounds[stratum], bounds[stratum + 1])
+        drawn = np.sort(rng.choice(units, size=min(UNITS_PER_STRATUM, len(units)), replace=False))
+        rows.extend((unit, stratum, len(units), len(drawn)) for unit in drawn)
+    design = pd.DataFrame(rows, columns=['unit', 'stratum', 'stratum_units', 'sampled_units'])
+    # Unit numbers run across the shards in order
+    first_unit = np.cumsum(shard_units) - shard_units
+    design['shard'] = np.searchsorted(np.cumsum(shard_units), design['unit'], side='right')
+    design['start'] = (design['unit'] - first_unit[design['shard']]) * unit_size
+    design['end'] = np.minimum(design['start'] + unit_size, sizes[design['shard']])
+    return design
+
+
+def _unit_counts(path, start, end):
+    pdf, _ = parse_block(read_range(path, start, end))
+    return category_month_partial(pdf).dropna()
+
+
+def sample_category_month_units(path, fraction, seed=0):
+    """Category-month counts of each sampled unit (every counting mode), with the unit's design columns."""
+    paths = shard_paths(path)
+    for shard in paths:
+        if compression_of(shard):
+            raise ValueError(f"Sampling byte ranges needs an uncompressed snapshot, got {shard}")
+    design = sample_design([os.path.getsize(shard) for shard in paths], fraction, seed)
+    counts = dask.compute(*[dask.delayed(_unit_counts)(paths[shard], start, end)
+                            for shard, start, end in zip(design['shard'], design['start'], design['end'])])
+    units = pd.concat([c.assign(unit=unit) for c, unit in zip(counts, design['unit'])], ignore_index=True)
+    columns = ['unit', 'stratum', 'stratum_units', 'sampled_units']
+    return design[columns].merge(units, on='unit')[columns + ['month', 'categories_list'] + list(COUNT_COLUMNS.values())]
+
+
+def t_quantile(df, z=Z):
+    """Student t quantile matching the normal quantile z (Cornish-Fisher expansion, no scipy needed)."""
+    df = max(df, 1)
+    return z + (z**3 + z) / (4 * df) + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+
+
+def estimate_totals(units, keys, count_column='count'):
+    """Estimated totals of count_column per keys with standard errors and 95% intervals, from per-unit counts."""
+    per_unit = units.groupby(keys + ['stratum', 'unit'])[count_column].sum().rename('y').reset_index()
+    per_unit['y2'] = per_unit['y'] ** 2
+    strata = units.groupby('stratum')[['stratum_units', 'sampled_units']].first()
+    by_stratum = per_unit.groupby(keys + ['stratum'])[['y', 'y2']].sum().reset_index().join(strata, on='stratum')
+    n_h, N_h = by_stratum['sampled_units'], by_stratum['stratum_units']
+    mean = by_stratum['y'] / n_h
+    # Units of the stratum that did not contain the key count as zeros
+    s2 = ((by_stratum['y2'] - n_h * mean ** 2) / (n_h - 1).where(n_h > 1)).fillna(0).clip(lower=0)
+    by_stratum['total'] = N_h * mean
+    by_stratum['variance'] = N_h ** 2 * (1 - n_h / N_h) * s2 / n_h
+    totals = by_stratum.groupby(keys)[['total', 'variance']].sum()
+    stderr = np.sqrt(totals['variance'])
+    # Few units per stratum: the variance has sum(n_h - 1) degrees of freedom, so use t intervals
+    margin = t_quantile(int((strata['sampled_units'] - 1).sum())) * stderr
+    return pd.DataFrame({
+        'count': totals['total'].round().astype(np.int64),
+        'stderr': stderr.round(1),
+        'count_low': (totals['total'] - margin).clip(lower=0).round().astype(np.int64),
+        'count_high': (totals['total'] + margin).round().astype(np.int64),
+    }).reset_index()
@@ -0,0 +1,135 @@
+"""
+Mergeable sketches used by the streaming aggregates.
+
+All sketches are kept as sparse tables with one row per used cell, keyed by group columns,
+so many small groups (e.g. one sketch per month and category) stay cheap while a single
+group never grows past the sketch size:
+
+- HyperLogLog (distinct counts): (group keys..., register, rank) rows; merging across blocks,
+  or rolling months up to years, is a groupby max.
+- Count-Min (frequencies): (group keys..., row, col, count) rows; merging is a groupby sum.
+- SpaceSaving (heavy hitters): the top `capacity` (item, count, error) rows per group, where
+  count is an upper bound and count - error a lower bound of the item's frequency.
+"""
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+CMS_DEPTH = 4
+CMS_WIDTH = 2**14
+HASH_KEY = '0123456789123456'  # pandas' default hash key
+
+
+def hash64(values, seed=None):
+    """Deterministic 64-bit hashes of an array of strings; different seeds give independent hashes."""
+    hash_key = HASH_KEY if seed is None else f'{seed:016d}'
+    return pd.util.hash_array(np.asarray(values, dtype=object), hash_key=hash_key)
+
+
+def _bit_length(values):
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        length += shift * high
+        values = np.where(high, values >> np.uint64(shift), values)
+    return length + (values > 0)
+
+
+def hll_registers(groups, values, p=HLL_PRECISION):
+    """
+    Sparse HyperLogLog registers of values, one sketch per row of groups (a DataFrame of key
+    columns aligned with values). Returns the key columns plus 'register' and 'rank'.
+    """
+    hashes = hash64(values)
+    suffix_bits = 64 - p
+    rank = suffix_bits + 1 - _bit_length(hashes & np.uint64((1 << suffix_bits) - 1))
+    table = groups.reset_index(drop=True).assign(
+        register=(hashes >> np.uint64(suffix_bits)).astype(np.int64), rank=rank.astype(np.int8))
+    return hll_merge([table], list(groups.columns))
+
+
+def hll_merge(tables, keys):
+    """Union of sparse HLL register tables, per keys."""
+    combined = pd.concat(tables, ignore_index=True)
+    return combined.groupby(keys + ['register'], sort=False)['rank'].max().reset_index()
+
+
+def hll_estimate(registers, keys, p=HLL_PRECISION):
+    """Cardinality estimate per group of a sparse register table (with small-range correction)."""
+    m = 1 << p
+    alpha = 0.7213 / (1 + 1.079 / m)
+    inverse = np.exp2(-registers['rank'].astype(float))
+    grouped = inverse.groupby([registers[k] for k in keys])
+    filled = grouped.size()
+    zeros = m - filled
+    raw = alpha * m * m / (grouped.sum() + zeros)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / zeros.where(zeros > 0))
+    estimate = raw.where((raw > 2.5 * m) | (zeros == 0), linear)
+    return estimate.rename('estimate')
+
+
+def _cms_cells(groups, values, counts, width, depth):
+    cells = [groups.reset_index(drop=True).assign(
+        row=row, col=(hash64(values, seed=row) % np.uint64(width)).astype(np.int64), count=counts)
+        for row in range(depth)]
+    return pd.concat(cells, ignore_index=True)
+
+
+def cms_table(groups, values, counts=1, width=CMS_WIDTH, depth=CMS_DEPTH):
+    """Sparse Count-Min sketch of values (weighted by counts), one sketch per row of groups."""
+    counts = np.broadcast_to(np.asarray(counts, dtype=np.int64), (len(values),))
+    return cms_merge([_cms_cells(groups, values, counts, width, depth)], list(groups.columns))
+
+
+def cms_merge(tables, keys):
+    combined = pd.concat(tables, ignore_index=True)
+    return combined.groupby(keys + ['row', 'col'], sort=False)['count'].sum().reset_index()
+
+
+def cms_query(table, groups, values, width=CMS_WIDTH, depth=CMS_DEPTH):
+    """Count-Min frequency estimates (upper bounds) of values in their groups' sketches."""
+    keys = list(groups.columns)
+    cells = _cms_cells(groups, values, np.zeros(len(values), dtype=np.int64), width, depth)
+    cells['position'] = np.tile(np.arange(len(values)), depth)
+    found = cells.drop(columns='count').merge(table, on=keys + ['row', 'col'], how='left')
+    return found.groupby('position')['count'].min().fillna(0).reindex(range(len(values))).to_numpy()
+
+
+def _keep_top(table, keys, capacity):
+    """Top capacity items per group; floor is the largest dropped count (0 if nothing was dropped)."""
+    table = table.sort_values(keys + ['count'], ascending=[True] * len(keys) + [False], kind='stable')
+    position = table.groupby(keys, sort=False).cumcount()
+    dropped = table[position >= capacity].groupby(keys)['count'].max().rename('dropped')
+    return table[position < capacity], dropped
+
+
+def spacesaving_summary(groups, values, capacity):
+    """Heavy-hitter summary of one block: exact counts of the top capacity values per group."""
+    keys = list(groups.columns)
+    counts = groups.reset_index(drop=True).assign(item=np.asarray(values, dtype=object))
+    counts = counts.groupby(keys + ['item']).size().rename('count').reset_index()
+    top, dropped = _keep_top(counts, keys, capacity)
+    top = top.merge(dropped.rename('floor').reset_index(), on=keys, how='left')
+    return top.assign(error=0, floor=top['floor'].fillna(0).astype(np.int64))
+
+
+def spacesaving_merge(a, b, keys, capacity):
+    """
+    Merge two summaries. An item missing from one side may still have occurred there up to that
+    side's floor, so the floor is added to both its upper bound (count) and its error.
+    """
+    floors = pd.concat([a.groupby(keys)['floor'].first().rename('floor_a'),
+                        b.groupby(keys)['floor'].first().rename('floor_b')], axis=1).fillna(0)
+    merged = a.drop(columns='floor').merge(b.drop(columns='floor'), on=keys + ['item'], how='outer', suffixes=('_a', '_b'))
+    merged = merged.merge(floors.reset_index(), on=keys, how='left')
+    missing_a = merged['count_a'].isna()
+    missing_b = merged['count_b'].isna()
+    merged['count'] = (merged['count_a'].fillna(merged['floor_a']) + merged['count_b'].fillna(merged['floor_b'])).astype(np.int64)
+    merged['error'] = (merged['error_a'].fillna(0) + merged['error_b'].fillna(0)
+                       + merged['floor_a'].where(missing_a, 0) + merged['floor_b'].where(missing_b, 0)).astype(np.int64)
+    top, dropped = _keep_top(merged[keys + ['item', 'count', 'error']], keys, capacity)
+    # Anything not kept occurred at most floor_a + floor_b times, or at most its dropped count
+    floor = pd.concat([floors.sum(axis=1), dropped], axis=1).max(axis=1).rename('floor')
+    return top.merge(floor.reset_index(), on=keys, how='left').assign(floor=lambda t: t['floor'].fillna(0).astype(np.int64))
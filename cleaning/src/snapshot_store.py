@@ -0,0 +1,140 @@
+"""
+Versioned, append-only store of category-month count cubes, one per arXiv snapshot release.
+
+Layout of cleaning/history/:
+- dictionary.json: append-only lists of months and categories; a key's position is its code
+- snapshots/<snapshot_date>.npz: (category_code, month_code, count) columns sorted by category
+
+Keys are stored as small integer codes, so a release costs a few bytes per non-zero cell and
+the codes of existing keys never change. Because rows are sorted by category, the rows of one
+category are found by binary search without decoding the whole cube.
+
+Usage:
+    python cleaning/src/snapshot_store.py list
+    python cleaning/src/snapshot_store.py diff 2024-01-01 2024-06-01 --category cs.LG
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = 'cleaning/history'
+
+
+def _dictionary_path(store_dir):
+    return os.path.join(store_dir, 'dictionary.json')
+
+
+def _snapshot_path(store_dir, snapshot_date):
+    return os.path.join(store_dir, 'snapshots', f'{snapshot_date}.npz')
+
+
+def load_dictionary(store_dir=STORE_DIR):
+    try:
+        with open(_dictionary_path(store_dir), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'months': [], 'categories': []}
+
+
+def list_snapshots(store_dir=STORE_DIR):
+    snapshot_dir = os.path.join(store_dir, 'snapshots')
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(name[:-len('.npz')] for name in os.listdir(snapshot_dir) if name.endswith('.npz'))
+
+
+def _encode(values, keys):
+    """Codes of values in keys, appending unseen values to keys (in place)."""
+    codes = {key: i for i, key in enumerate(keys)}
+    for value in pd.unique(values):
+        if value not in codes:
+            codes[value] = len(keys)
+            keys.append(value)
+    return pd.Series(values).map(codes).to_numpy()
+
+
+def add_snapshot(counts, snapshot_date, store_dir=STORE_DIR):
+    """
+    Append a category-month count table (month, categories_list, count) as release snapshot_date.
+    Returns False if an identical release is already stored; a different one raises ValueError.
+    """
+    path = _snapshot_path(store_dir, snapshot_date)
+    dictionary = load_dictionary(store_dir)
+    month_codes = _encode(counts['month'].astype(str), dictionary['months'])
+    category_codes = _encode(counts['categories_list'].astype(str), dictionary['categories'])
+    order = np.lexsort((month_codes, category_codes))
+    columns = {
+        'category': category_codes[order].astype(np.uint16),
+        'month': month_codes[order].astype(np.uint16),
+        'count': counts['count'].to_numpy()[order].astype(np.uint32),
+    }
+    if os.path.exists(path):
+        stored = load_snapshot(snapshot_date, store_dir)
+        if all(np.array_equal(stored[name], columns[name]) for name in columns):
+            return False
+        raise ValueError(f"Snapshot {snapshot_date} is already stored with different counts")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp.npz'
+    np.savez_compressed(tmp_path, **columns)
+    # Dictionary first: it only grows, so it is valid for older snapshots too
+    with open(_dictionary_path(store_dir) + '.tmp', 'w') as f:
+        json.dump(dictionary, f)
+    os.replace(_dictionary_path(store_dir) + '.tmp', _dictionary_path(store_dir))
+    os.replace(tmp_path, path)
+    return True
+
+
+def load_snapshot(snapshot_date, store_dir=STORE_DIR):
+    with np.load(_snapshot_path(store_dir, snapshot_date)) as data:
+        return {name: data[name] for name in data.files}
+
+
+def category_series(snapshot_date, category, store_dir=STORE_DIR, dictionary=None):
+    """Monthly counts of one category in one release, as a Series indexed by month."""
+    dictionary = dictionary or load_dictionary(store_dir)
+    snapshot = load_snapshot(snapshot_date, store_dir)
+    if category not in dictionary['categories']:
+        return pd.Series(dtype='int64', name=snapshot_date)
+    code = dictionary['categories'].index(category)
+    lo, hi = np.searchsorted(snapshot['category'], [code, code + 1])
+    months = np.asarray(dictionary['months'], dtype=object)[snapshot['month'][lo:hi]]
+    return pd.Series(snapshot['count'][lo:hi].astype('int64'), index=pd.Index(months, name='month'), name=snapshot_date)
+
+
+def diff(release_a, release_b, category, store_dir=STORE_DIR):
+    """Per-month counts of category in two releases and the change from release_a to release_b."""
+    dictionary = load_dictionary(store_dir)
+    a = category_series(release_a, category, store_dir, dictionary)
+    b = category_series(release_b, category, store_dir, dictionary)
+    table = pd.concat([a.rename('count_a'), b.rename('count_b')], axis=1).fillna(0).astype('int64').sort_index()
+    table['delta'] = table['count_b'] - table['count_a']
+    return table.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the snapshot history store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="list stored snapshot releases")
+    diff_parser = subparsers.add_parser('diff', help="compare one category between two releases")
+    diff_parser.add_argument('release_a')
+    diff_parser.add_argument('release_b')
+    diff_parser.add_argument('--category', required=True)
+    diff_parser.add_argument('--changed-only', action='store_true', help="only show months whose count changed")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for snapshot_date in list_snapshots():
+            print(snapshot_date)
+    else:
+        table = diff(args.release_a, args.release_b, args.category)
+        if args.changed_only:
+            table = table[table['delta'] != 0]
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
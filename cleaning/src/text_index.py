@@ -0,0 +1,310 @@
+"""
+On-disk inverted index over paper titles and abstracts with category and month facets.
+
+Each snapshot block is indexed independently (index_block, run as a checkpointed stage)
+into a segment of delta/varint-encoded postings; segments are merged in block order, so
+global doc ids (the paper's position in the snapshot) stay sorted and only the first delta
+of each segment's posting list has to be re-encoded. The merge streams: segments are read one
+at a time and spilled to disk, then merged k-way by term (write_index).
+
+Layout of cleaning/index/:
+- terms.bin / term_offsets.npy: sorted terms, newline-joined, with their byte offsets
+- postings.bin / posting_offsets.npy / doc_freq.npy: varint-encoded doc id gaps per term
+- doc_ids.bin / doc_id_offsets.npy: arXiv id of every doc
+- doc_month.npy: month code of every doc
+- doc_cat_indptr.npy / doc_cat_codes.npy: category codes of every doc (CSR layout)
+- dictionary.json: month and category lists that the codes index into
+
+Usage:
+    python cleaning/src/text_index.py diffusion --category cs.CV
+"""
+import argparse
+import heapq
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+INDEX_DIR = 'cleaning/index'
+MERGE_CHUNK = 4096  # spilled term rows read at a time per segment during the merge
+TOKEN_PATTERN = r'[a-z][a-z0-9]+'
+STOPWORDS = frozenset(
+    'an and are as at be by can for from has have in is it its of on or such that the their these this '
+    'to using was we were which with'.split())
+
+
+def varint_encode(values):
+    """LEB128-encode non-negative integers (< 2**35) into one byte string, vectorized."""
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 5):
+        n_bytes += values >= (1 << (7 * k))
+    ends = np.cumsum(n_bytes)
+    starts = ends - n_bytes
+    out = np.zeros(int(ends[-1]) if len(values) else 0, dtype=np.uint8)
+    for k in range(5):
+        mask = n_bytes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (n_bytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = chunk | more
+    return out.tobytes(), n_bytes
+
+
+def varint_decode(data):
+    """Decode a byte string of LEB128 integers into a uint64 array, vectorized."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=np.uint64)
+    last = raw < 0x80
+    value_index = np.concatenate(([0], np.cumsum(last)[:-1]))
+    first_byte = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    shift = (np.arange(len(raw)) - first_byte[value_index]) * 7
+    parts = (raw & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.bincount(value_index, weights=parts, minlength=int(last.sum())).astype(np.uint64)
+
+
+def tokenize(texts):
+    """Lowercased word tokens per text, as a Series of token strings indexed by text position."""
+    tokens = texts.fillna('').str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    return tokens[~tokens.isin(STOPWORDS)]
+
+
+def index_block(pdf):
+    """Index stage: segment of postings for one block, plus the block's doc facets."""
+    texts = pdf['title'].fillna('') + ' ' + pdf['abstract'].fillna('')
+    texts.index = np.arange(len(pdf))
+    tokens = tokenize(texts)
+    pairs = pd.DataFrame({'term': tokens.to_numpy(), 'doc': tokens.index.to_numpy(dtype=np.int64)})
+    pairs = pairs.drop_duplicates().sort_values(['term', 'doc'], kind='stable')
+    term_codes, terms = pd.factorize(pairs['term'], sort=True)
+    docs = pairs['doc'].to_numpy()
+    is_first = np.concatenate(([True], term_codes[1:] != term_codes[:-1])) if len(docs) else np.zeros(0, dtype=bool)
+    gaps = np.where(is_first, docs, docs - np.concatenate(([0], docs[:-1])))
+    blob, n_bytes = varint_encode(gaps)
+    counts = np.bincount(term_codes, minlength=len(terms))
+    byte_ends = np.cumsum(np.add.reduceat(n_bytes, np.flatnonzero(is_first))) if len(docs) else np.zeros(0, dtype=np.int64)
+    return {
+        'terms': np.asarray(terms, dtype=object),
+        'doc_freq': counts,
+        'byte_offsets': np.concatenate(([0], byte_ends)),
+        'last_doc': docs[np.concatenate((np.flatnonzero(is_first)[1:] - 1, [len(docs) - 1]))] if len(docs) else docs,
+        'blob': blob,
+        'n_docs': len(pdf),
+        'ids': pdf['id'].astype(str).to_numpy(),
+        'months': pdf['update_date'].str[:7].fillna('').to_numpy(),
+        'categories': pdf['categories'].fillna('').to_numpy(),
+    }
+
+
+def _encode(values, keys, codes):
+    for value in pd.unique(values):
+        if value not in codes:
+            codes[value] = len(keys)
+            keys.append(value)
+    return pd.Series(values).map(codes).to_numpy()
+
+
+def _append_strings(f, encoded, lengths):
+    """Append encoded strings to a newline-joined blob, recording their lengths (with the separator)."""
+    if not encoded:
+        return
+    if lengths:
+        f.write(b'\n')
+    f.write(b'\n'.join(encoded))
+    lengths.append(np.fromiter((len(s) + 1 for s in encoded), dtype=np.int64, count=len(encoded)))
+
+
+def _save_offsets(lengths, offsets_path):
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    np.save(offsets_path, np.concatenate(([0], np.cumsum(lengths))))
+
+
+def _spill_segments(part_paths, index_dir, spill_dir):
+    """
+    First pass over the index_block checkpoints, one at a time: write the doc facets and ids,
+    and append each segment's terms, postings and per-term rows (term bytes, posting bytes,
+    doc_freq, last doc) to three spill files. Returns the spill row range and doc offset of
+    every segment, and the doc count.
+    """
+    from checkpoint import load_part
+
+    months, categories = [], []
+    month_codes, category_codes = {}, {}
+    doc_months, doc_cat_codes, doc_cat_lengths, id_lengths = [], [], [], []
+    segments = []
+    offset = 0
+    term_pos = posting_pos = n_rows = 0
+    with open(os.path.join(index_dir, 'doc_ids.bin'), 'wb') as ids_file, \
+            open(os.path.join(spill_dir, 'terms.bin'), 'wb') as terms_file, \
+            open(os.path.join(spill_dir, 'postings.bin'), 'wb') as postings_file, \
+            open(os.path.join(spill_dir, 'rows.bin'), 'wb') as rows_file:
+        for part_path in part_paths:
+            segment = load_part(part_path)
+            terms = [term.encode('utf-8') for term in segment['terms']]
+            term_ends = term_pos + np.cumsum([len(term) for term in terms], dtype=np.int64)
+            bounds = posting_pos + np.asarray(segment['byte_offsets'], dtype=np.int64)
+            rows = np.column_stack([
+                np.concatenate(([term_pos], term_ends[:-1])) if terms else term_ends, term_ends,
+                bounds[:-1], bounds[1:],
+                np.asarray(segment['doc_freq'], dtype=np.int64), np.asarray(segment['last_doc'], dtype=np.int64),
+            ]).astype(np.int64)
+            terms_file.write(b''.join(terms))
+            postings_file.write(segment['blob'])
+            rows.tofile(rows_file)
+            segments.append((n_rows, n_rows + len(terms), offset))
+            term_pos = int(term_ends[-1]) if terms else term_pos
+            posting_pos = int(bounds[-1])
+            n_rows += len(terms)
+
+            _append_strings(ids_file, [doc_id.encode('utf-8') for doc_id in segment['ids']], id_lengths)
+            doc_months.append(_encode(segment['months'], months, month_codes))
+            cats = pd.Series(segment['categories']).str.split().explode().fillna('')
+            cats = cats[cats != '']
+            doc_cat_codes.append(_encode(cats.to_numpy(), categories, category_codes))
+            doc_cat_lengths.append(np.bincount(cats.index.to_numpy(dtype=np.int64), minlength=segment['n_docs']))
+            offset += segment['n_docs']
+
+    _save_offsets(id_lengths, os.path.join(index_dir, 'doc_id_offsets.npy'))
+    np.save(os.path.join(index_dir, 'doc_month.npy'), np.concatenate(doc_months).astype(np.uint16))
+    lengths = np.concatenate(doc_cat_lengths)
+    np.save(os.path.join(index_dir, 'doc_cat_indptr.npy'), np.concatenate(([0], np.cumsum(lengths))).astype(np.int64))
+    np.save(os.path.join(index_dir, 'doc_cat_codes.npy'), np.concatenate(doc_cat_codes).astype(np.uint16))
+    with open(os.path.join(index_dir, 'dictionary.json'), 'w') as f:
+        json.dump({'months': months, 'categories': categories}, f)
+    return segments, offset
+
+
+def _segment_rows(terms, rows, number, start, end, doc_offset):
+    """(term, segment number, posting start, posting end, doc_freq, last doc) of a spilled segment, in term order."""
+    for chunk_start in range(start, end, MERGE_CHUNK):
+        chunk = rows[chunk_start:min(chunk_start + MERGE_CHUNK, end)]
+        base = int(chunk[0, 0])
+        chunk_terms = terms[base:int(chunk[-1, 1])].tobytes()
+        for term_start, term_end, posting_start, posting_end, freq, last in chunk.tolist():
+            yield (chunk_terms[term_start - base:term_end - base], number,
+                   posting_start, posting_end, freq, last + doc_offset)
+
+
+def write_index(part_paths, index_dir=INDEX_DIR):
+    """
+    Merge the index_block segments checkpointed at part_paths (in block order) into the on-disk
+    index, as streams: segments are spilled to disk one at a time, then their memory-mapped term
+    lists are merged k-way by term, so only the current term's postings are held in memory.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    spill_dir = os.path.join(index_dir, 'segments')
+    shutil.rmtree(spill_dir, ignore_errors=True)
+    os.makedirs(spill_dir)
+    segments, n_docs = _spill_segments(part_paths, index_dir, spill_dir)
+
+    def spilled(name, dtype):
+        path = os.path.join(spill_dir, name)
+        return np.memmap(path, dtype=dtype, mode='r') if os.path.getsize(path) else np.zeros(0, dtype=dtype)
+
+    terms = spilled('terms.bin', np.uint8)
+    postings = spilled('postings.bin', np.uint8)
+    rows = spilled('rows.bin', np.int64).reshape(-1, 6)
+    streams = [_segment_rows(terms, rows, number, start, end, doc_offset)
+               for number, (start, end, doc_offset) in enumerate(segments)]
+    term_lengths, posting_offsets, doc_freq = [], [0], []
+    current, last_doc = None, 0
+    with open(os.path.join(index_dir, 'terms.bin'), 'wb') as terms_file, \
+            open(os.path.join(index_dir, 'postings.bin'), 'wb') as postings_file:
+        # Ties on a term come out in segment order, so the doc ids of a term stay sorted
+        for term, number, start, end, freq, last in heapq.merge(*streams):
+            chunk = postings[start:end].tobytes()
+            first_len = next(k for k, byte in enumerate(chunk) if byte < 0x80) + 1
+            first_doc = int(varint_decode(chunk[:first_len])[0]) + segments[number][2]
+            if term == current:
+                head, _ = varint_encode([first_doc - last_doc])
+                doc_freq[-1] += freq
+            else:
+                _append_strings(terms_file, [term], term_lengths)
+                head, _ = varint_encode([first_doc])
+                posting_offsets.append(posting_offsets[-1])
+                doc_freq.append(freq)
+                current = term
+            postings_file.write(head)
+            postings_file.write(chunk[first_len:])
+            posting_offsets[-1] += len(head) + len(chunk) - first_len
+            last_doc = last
+    del terms, postings, rows
+    shutil.rmtree(spill_dir)
+
+    _save_offsets(term_lengths, os.path.join(index_dir, 'term_offsets.npy'))
+    np.save(os.path.join(index_dir, 'posting_offsets.npy'), np.array(posting_offsets, dtype=np.int64))
+    np.save(os.path.join(index_dir, 'doc_freq.npy'), np.array(doc_freq, dtype=np.int64))
+    return len(doc_freq), n_docs
+
+
+class TextIndex:
+    """Read-only view of an index directory; arrays and postings are memory-mapped."""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        def load(name):
+            return np.load(os.path.join(index_dir, name), mmap_mode='r')
+
+        self.terms = np.memmap(os.path.join(index_dir, 'terms.bin'), dtype=np.uint8, mode='r')
+        self.term_offsets = load('term_offsets.npy')
+        self.postings = np.memmap(os.path.join(index_dir, 'postings.bin'), dtype=np.uint8, mode='r')
+        self.posting_offsets = load('posting_offsets.npy')
+        self.doc_month = load('doc_month.npy')
+        self.doc_cat_indptr = load('doc_cat_indptr.npy')
+        self.doc_cat_codes = load('doc_cat_codes.npy')
+        with open(os.path.join(index_dir, 'dictionary.json'), 'r') as f:
+            dictionary = json.load(f)
+        self.months = np.asarray(dictionary['months'], dtype=object)
+        self.categories = dictionary['categories']
+
+    def _term(self, i):
+        return self.terms[self.term_offsets[i]:self.term_offsets[i + 1] - 1].tobytes()
+
+    def _find(self, term):
+        key = term.encode('utf-8')
+        lo, hi = 0, len(self.term_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.term_offsets) - 1 and self._term(lo) == key else None
+
+    def docs(self, term, category=None):
+        """Sorted doc ids containing term (optionally restricted to papers listed in category)."""
+        i = self._find(term.lower())
+        if i is None:
+            return np.zeros(0, dtype=np.int64)
+        chunk = self.postings[self.posting_offsets[i]:self.posting_offsets[i + 1]].tobytes()
+        docs = np.cumsum(varint_decode(chunk)).astype(np.int64)
+        if category is None:
+            return docs
+        if category not in self.categories:
+            return docs[:0]
+        starts = self.doc_cat_indptr[docs]
+        lengths = self.doc_cat_indptr[docs + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        hit = self.doc_cat_codes[positions] == self.categories.index(category)
+        owners = np.repeat(np.arange(len(docs)), lengths)
+        return docs[np.unique(owners[hit])]
+
+    def counts_by_month(self, term, category=None):
+        docs = self.docs(term, category)
+        counts = np.bincount(self.doc_month[docs], minlength=len(self.months))
+        series = pd.Series(counts, index=pd.Index(self.months, name='month'), name='count')
+        return series[series > 0].sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count papers mentioning a term per month")
+    parser.add_argument('term')
+    parser.add_argument('--category', help="only papers listed in this category, e.g. cs.CV")
+    args = parser.parse_args()
+    index = TextIndex()
+    print(index.counts_by_month(args.term, args.category).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Day x category count cube with precomputed week/month/quarter/year rollups.
+
+Counts are kept in dense int32 arrays indexed by (period, category code), one per grain, where
+the day array covers every day from the first to the last update_date and each coarser grain is
+computed from it once with np.add.reduceat over its period boundaries. Any time grain, category
+or date range is then served by slicing an array instead of rescanning the snapshot.
+
+Layout of cleaning/asset/category_day_cube.npz:
+- categories: category names the column codes index into
+- <grain>_counts / <grain>_periods for grain in GRAINS: counts and period labels (e.g. 2024-W07
+  for the week starting Monday 2024-02-12, 2024Q1, 2024-02, 2024)
+
+Usage:
+    python cleaning/src/time_cube.py week cs.LG --start 2023-01-01 --end 2023-03-31
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CUBE_PATH = 'cleaning/asset/category_day_cube.npz'
+GRAINS = ('day', 'week', 'month', 'quarter', 'year')
+PERIOD_FREQ = {'week': 'W-SUN', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+
+def category_day_partial(pdf):
+    """Count (day, category) pairs in one block; each listed category counts once."""
+    exploded = pd.DataFrame({
+        'day': pdf['update_date'].str[:10],
+        'category': pdf['categories'].str.split()
+    }).explode('category')
+    return exploded.groupby(['day', 'category']).size().reset_index(name='count')
+
+
+def _period_labels(days, grain):
+    if grain == 'day':
+        return days.strftime('%Y-%m-%d')
+    periods = days.to_period(PERIOD_FREQ[grain])
+    if grain == 'week':
+        start = periods.start_time
+        return start.strftime('%G-W%V')
+    return periods.astype(str)
+
+
+def build_cube(counts):
+    """Cube arrays (see the module docstring) from a (day, category, count) table."""
+    days = pd.to_datetime(counts['day'], format='%Y-%m-%d', errors='coerce')
+    counts = counts[days.notna()]
+    days = days[days.notna()]
+    categories = np.sort(counts['category'].unique())
+    all_days = pd.date_range(days.min(), days.max(), freq='D')
+    day_counts = np.zeros((len(all_days), len(categories)), dtype=np.int32)
+    np.add.at(day_counts, ((days - all_days[0]).dt.days.to_numpy(), np.searchsorted(categories, counts['category'].to_numpy())),
+              counts['count'].to_numpy(dtype=np.int32))
+    cube = {'categories': categories.astype(str)}
+    for grain in GRAINS:
+        labels = np.asarray(_period_labels(all_days, grain), dtype=str)
+        starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+        cube[f'{grain}_counts'] = np.add.reduceat(day_counts, starts, axis=0) if len(starts) else day_counts
+        cube[f'{grain}_periods'] = labels[starts]
+    return cube
+
+
+def save_cube(cube, path=CUBE_PATH):
+    np.savez_compressed(path, **cube)
+
+
+class TimeCube:
+    """Read access to the cube at any grain."""
+
+    def __init__(self, path=CUBE_PATH):
+        with np.load(path) as data:
+            self.arrays = {name: data[name] for name in data.files}
+        self.categories = list(self.arrays['categories'])
+
+    def counts(self, grain='month', categories=None, start=None, end=None):
+        """
+        Counts per period (rows) and category (columns) at grain, for periods overlapping the
+        dates start..end (YYYY-MM-DD, inclusive); categories=None keeps every category.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"grain must be one of {GRAINS}, got {grain}")
+        periods = self.arrays[f'{grain}_periods']
+        lo, hi = 0, len(periods)
+        if start is not None:
+            lo = np.searchsorted(periods, _period_labels(pd.DatetimeIndex([start]), grain)[0])
+        if end is not None:
+            hi = np.searchsorted(periods, _period_labels(pd.DatetimeIndex([end]), grain)[0], side='right')
+        columns = range(len(self.categories)) if categories is None else \
+            [self.categories.index(c) for c in categories if c in self.categories]
+        block = self.arrays[f'{grain}_counts'][lo:hi][:, list(columns)]
+        return pd.DataFrame(block, index=pd.Index(periods[lo:hi], name=grain),
+                            columns=[self.categories[c] for c in columns])
+
+    def totals(self, grain='month', start=None, end=None):
+        """Category-listing totals per period at grain."""
+        return self.counts(grain, start=start, end=end).sum(axis=1).rename('count')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print counts of one category at any time grain")
+    parser.add_argument('grain', choices=GRAINS)
+    parser.add_argument('category', nargs='?', help="category, e.g. cs.LG (default: all categories)")
+    parser.add_argument('--start', help="first date, YYYY-MM-DD")
+    parser.add_argument('--end', help="last date, YYYY-MM-DD")
+    args = parser.parse_args()
+    cube = TimeCube()
+    if args.category:
+        print(cube.counts(args.grain, [args.category], args.start, args.end).to_string())
+    else:
+        print(cube.totals(args.grain, args.start, args.end).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,46 @@
 run_all.py
 
 Runs all data cleaning and visualization scripts in order for the arXiv category analysis project.
+
+Scripts run in this one process with a shared context (see cleaning/src/context.py), so libraries
+are imported once and data loaded by one script is reused by the next. The block stages of all
+selected cleaning scripts run first, in one pass over the snapshot. Name scripts to run only
+those, in pipeline order; the options of every script are accepted:
+
+    python run_all.py extract_category_month_counts arxiv_subcategory_yearly_distribution --sample 0.05
 """
-import subprocess
-import sys
+import argparse
+import importlib
 import os
+import sys
+import time
 
 CLEANING_DIR = "cleaning/src"
 VISUALIZATION_DIR = "visualization/src"
 
+sys.path.insert(0, CLEANING_DIR)
+from context import Context, add_input_arguments  # noqa: E402
+
 cleaning_scripts = [
     "extract_official_categories.py",
     "extract_official_category_names.py",
     "extract_unique_categories.py",
+    "extract_duplicate_clusters.py",
     "extract_category_month_counts.py",
     "extract_major_category_month_counts.py",
-    "extract_total_category_month_counts.py"
+    "extract_total_category_month_counts.py",
+    "extract_category_trends.py",
+    "archive_category_month_counts.py",
+    "extract_revision_histograms.py",
+    "extract_publication_uptake.py",
+    "build_text_index.py",
+    "extract_term_trends.py",
+    "extract_distinct_authors.py",
+    "extract_top_submitters.py",
+    "build_record_index.py",
+    "extract_coauthor_graph.py",
+    "extract_category_day_cube.py",
+    "export_database.py"
 ]
 
 visualization_scripts = [
@@ -24,23 +49,76 @@ visualization_scripts = [
     "arxiv_category_monthly_publication_distribution.py",
     "arxiv_subcategory_monthly_distribution.py",
     "arxiv_subcategory_yearly_distribution.py",
-    "arxiv_top_subcategories_by_year_compact.py"
+    "arxiv_top_subcategories_by_year_compact.py",
+    "arxiv_top_terms_by_year.py",
+    "arxiv_revision_behavior_by_major_category.py",
+    "arxiv_journal_uptake_by_category.py"
 ]
 
-def run_scripts(scripts, directory):
-    for script in scripts:
+def load_modules(scripts, directory):
+    """Import scripts as modules; they defer their heavy imports to main, so this is cheap."""
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return {script: importlib.import_module(script[:-3]) for script in scripts}
+
+def parse_args(modules):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2], conflict_handler='resolve')
+    parser.add_argument('scripts', nargs='*', metavar='SCRIPT', help="scripts to run (default: all)")
+    parser.add_argument('--list', action='store_true', help="list the scripts in pipeline order and exit")
+    add_input_arguments(parser)
+    for module in modules.values():
+        if hasattr(module, 'add_arguments'):
+            module.add_arguments(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.scripts if os.path.splitext(name)[0] + '.py' not in modules]
+    if unknown:
+        parser.error(f"unknown scripts: {', '.join(unknown)} (see --list)")
+    return args
+
+def prepare_block_stages(modules, selected, context):
+    """Run the block stages of the selected scripts in one pass; each script then reads its results from the context."""
+    stages = {}
+    for script, module in modules.items():
+        if (not selected or script in selected) and hasattr(module, 'block_stages'):
+            stages.update(module.block_stages(context))
+    if not stages:
+        return
+    print(f"\nRunning {len(stages)} block stages in one pass over {context.data_path} ...")
+    start = time.perf_counter()
+    try:
+        context.prepare_stages(stages)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Finished the block stages in {time.perf_counter() - start:.1f}s")
+
+def run_scripts(modules, directory, selected, context):
+    for script, module in modules.items():
+        if selected and script not in selected:
+            continue
         script_path = os.path.join(directory, script)
         print(f"\nRunning {script_path} ...")
-        result = subprocess.run([sys.executable, script_path])
-        if result.returncode != 0:
-            print(f"Error running {script_path}")
-            sys.exit(result.returncode)
-        else:
-            print(f"Finished {script_path}")
+        start = time.perf_counter()
+        try:
+            module.main(context)
+        except SystemExit as e:
+            if e.code:
+                print(f"Error running {script_path}")
+                sys.exit(e.code)
+        print(f"Finished {script_path} in {time.perf_counter() - start:.1f}s")
 
 if __name__ == "__main__":
+    cleaning_modules = load_modules(cleaning_scripts, CLEANING_DIR)
+    visualization_modules = load_modules(visualization_scripts, VISUALIZATION_DIR)
+    args = parse_args({**cleaning_modules, **visualization_modules})
+    if args.list:
+        print('\n'.join(cleaning_scripts + visualization_scripts))
+        sys.exit(0)
+    selected = {os.path.splitext(name)[0] + '.py' for name in args.scripts}
+    context = Context(args)
     print("Starting data cleaning...")
-    run_scripts(cleaning_scripts, CLEANING_DIR)
+    prepare_block_stages(cleaning_modules, selected, context)
+    run_scripts(cleaning_modules, CLEANING_DIR, selected, context)
     print("\nStarting visualizations...")
-    run_scripts(visualization_scripts, VISUALIZATION_DIR)
+    run_scripts(visualization_modules, VISUALIZATION_DIR, selected, context)
     print("\nAll scripts completed successfully.")
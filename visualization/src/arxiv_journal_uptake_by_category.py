@@ -0,0 +1,88 @@
+# arxiv_journal_uptake_by_category.py
+"""
+Visualize what fraction of preprints end up published (journal reference or DOI), and how fast:
+1. Uptake rate by submission year per major category.
+2. Distribution of the publication lag (years from v1 to the journal reference's year).
+Saves image to visualization/asset/arxiv_journal_uptake_by_category.png and a per-subcategory
+table (uptake rate, median lag) to visualization/asset/journal_uptake_by_subcategory.csv
+"""
+import os
+import sys
+
+sys.path.insert(0, 'cleaning/src')
+from context import Context  # noqa: E402
+import render  # noqa: E402
+
+add_arguments = render.add_arguments
+
+
+def main(context):
+    plt = render.pyplot()
+    from aggregates import map_major_category
+    from publication import LAG_CAP_YEARS
+
+    args = context.options
+
+    # Paths
+    uptake_path = 'cleaning/asset/journal_uptake_category_year.csv'
+    lag_path = 'cleaning/asset/publication_lag_category_year.csv'
+    asset_dir = 'visualization/asset'
+    os.makedirs(asset_dir, exist_ok=True)
+
+    # Load data
+    try:
+        uptake = context.read_csv(uptake_path)
+        lag = context.read_csv(lag_path)
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found.")
+        sys.exit(1)
+
+    # Per-subcategory table: uptake over all years and the median lag
+    by_subcat = uptake.groupby('category')[['papers', 'journal_ref', 'doi', 'published']].sum()
+    by_subcat['uptake_rate'] = (by_subcat['published'] / by_subcat['papers'] * 100).round(2)
+    lag_hist = lag.groupby(['category', 'lag_years'])['count'].sum().reset_index()
+    lag_hist['cumulative'] = lag_hist.groupby('category')['count'].cumsum()
+    lag_hist['half'] = lag_hist.groupby('category')['count'].transform('sum') / 2
+    by_subcat['median_lag_years'] = lag_hist[lag_hist['cumulative'] >= lag_hist['half']].groupby('category')['lag_years'].first()
+    by_subcat = by_subcat.sort_values('uptake_rate', ascending=False)
+    csv_path = os.path.join(asset_dir, 'journal_uptake_by_subcategory.csv')
+    by_subcat.reset_index().to_csv(csv_path, index=False)
+    print(f"Saved journal uptake table to {csv_path}")
+
+    # Roll categories up to major categories (a cross-listed paper counts in each listed category)
+    uptake['major_category'] = uptake['category'].map(map_major_category)
+    lag['major_category'] = lag['category'].map(map_major_category)
+    yearly = uptake.groupby(['year', 'major_category'])[['published', 'papers']].sum()
+    uptake_rate = (yearly['published'] / yearly['papers'] * 100).unstack('major_category')
+    ordered_major_cats = uptake_rate.mean().sort_values(ascending=False).index
+
+    lag_share = lag.pivot_table(index='major_category', columns='lag_years', values='count', aggfunc='sum', fill_value=0)
+    lag_share = lag_share.div(lag_share.sum(axis=1), axis=0) * 100
+    lag_share = lag_share.reindex(ordered_major_cats[::-1]).dropna(how='all')
+    lag_labels = {-1: 'before v1', LAG_CAP_YEARS: f'{LAG_CAP_YEARS}+ years'}
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8), layout='constrained')
+    for cat in ordered_major_cats:
+        ax1.plot(uptake_rate.index, uptake_rate[cat], label=cat, linewidth=2)
+    ax1.set_title('Share of Preprints with a Journal Reference or DOI')
+    ax1.set_xlabel('Year of v1')
+    ax1.set_ylabel('Published (%)')
+    ax1.grid(True, linestyle='--', alpha=0.5)
+    ax1.legend(title='Major Category', fontsize=9)
+
+    cmap = plt.colormaps['viridis']
+    left = None
+    for idx, years in enumerate(lag_share.columns):
+        ax2.barh(lag_share.index, lag_share[years], left=left, color=cmap(idx / max(len(lag_share.columns) - 1, 1)),
+                 label=lag_labels.get(years, f'{years} years'))
+        left = lag_share[years].copy() if left is None else left + lag_share[years]
+    ax2.set_title('Publication Lag (Journal Reference Year minus Year of v1)')
+    ax2.set_xlabel('Share of papers with a publication year (%)')
+    ax2.set_xlim(0, 100)
+    ax2.legend(title='Lag', bbox_to_anchor=(1, 1), loc='upper left', fontsize=9)
+    path = render.save(fig, f'{asset_dir}/arxiv_journal_uptake_by_category', args)
+    print(f"Saved journal uptake chart to {path}")
+
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
@@ -0,0 +1,80 @@
+# arxiv_revision_behavior_by_major_category.py
+"""
+Visualize revision behavior per major category from the versions histograms:
+1. Mean number of versions per paper by submission year.
+2. Distribution of the time from v1 to the latest version, for revised papers.
+Saves image to visualization/asset/arxiv_revision_behavior_by_major_category.png
+"""
+import os
+import sys
+
+sys.path.insert(0, 'cleaning/src')
+from context import Context  # noqa: E402
+import render  # noqa: E402
+
+add_arguments = render.add_arguments
+
+
+def main(context):
+    plt = render.pyplot()
+    import pandas as pd
+    from aggregates import map_major_category
+
+    args = context.options
+
+    # Paths
+    versions_path = 'cleaning/asset/revision_versions_category_year.csv'
+    lag_path = 'cleaning/asset/revision_lag_category_year.csv'
+    asset_dir = 'visualization/asset'
+    os.makedirs(asset_dir, exist_ok=True)
+
+    # Load data
+    try:
+        versions = context.read_csv(versions_path)
+        lag = context.read_csv(lag_path)
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found.")
+        sys.exit(1)
+
+    # Roll categories up to major categories (a cross-listed paper counts in each listed category)
+    versions['major_category'] = versions['category'].map(map_major_category)
+    lag['major_category'] = lag['category'].map(map_major_category)
+
+    # Mean versions per paper; the capped top bin counts as its cap
+    versions['weighted'] = versions['versions'] * versions['count']
+    yearly = versions.groupby(['year', 'major_category'])[['weighted', 'count']].sum()
+    mean_versions = (yearly['weighted'] / yearly['count']).unstack('major_category')
+
+    # Share of revised papers per lag bin, over all years
+    lag['bin'] = [f'{low}-{int(high)} days' if pd.notna(high) else f'{low}+ days'
+                  for low, high in zip(lag['lag_days_low'], lag['lag_days_high'])]
+    lag_share = lag.pivot_table(index='major_category', columns='lag_days_low', values='count', aggfunc='sum', fill_value=0)
+    lag_share = lag_share.div(lag_share.sum(axis=1), axis=0) * 100
+    bin_labels = lag.drop_duplicates('lag_days_low').set_index('lag_days_low')['bin'].reindex(lag_share.columns)
+    ordered_major_cats = mean_versions.mean().sort_values(ascending=False).index
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8), layout='constrained')
+    for cat in ordered_major_cats:
+        ax1.plot(mean_versions.index, mean_versions[cat], label=cat, linewidth=2)
+    ax1.set_title('Mean Versions per Paper by Submission Year')
+    ax1.set_xlabel('Year of v1')
+    ax1.set_ylabel('Versions per paper')
+    ax1.grid(True, linestyle='--', alpha=0.5)
+    ax1.legend(title='Major Category', fontsize=9)
+
+    lag_share = lag_share.reindex(ordered_major_cats[::-1]).dropna(how='all')
+    colors = plt.colormaps['viridis'](range(0, 256, 256 // max(len(lag_share.columns), 1)))
+    left = None
+    for idx, low in enumerate(lag_share.columns):
+        ax2.barh(lag_share.index, lag_share[low], left=left, color=colors[idx], label=bin_labels[low])
+        left = lag_share[low].copy() if left is None else left + lag_share[low]
+    ax2.set_title('Time from v1 to Latest Version (Revised Papers)')
+    ax2.set_xlabel('Share of revised papers (%)')
+    ax2.set_xlim(0, 100)
+    ax2.legend(title='v1 to latest', bbox_to_anchor=(1, 1), loc='upper left', fontsize=9)
+    path = render.save(fig, f'{asset_dir}/arxiv_revision_behavior_by_major_category', args)
+    print(f"Saved revision behavior chart to {path}")
+
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
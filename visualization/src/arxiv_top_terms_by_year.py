@@ -0,0 +1,64 @@
+# arxiv_top_terms_by_year.py
+"""
+Visualize which topics drive growth inside the largest AI subcategories:
+heatmap of the yearly share of the top terms (titles + abstracts) for each focus subcategory.
+Saves image to visualization/asset/arxiv_top_terms_by_year.png
+"""
+import os
+import sys
+
+sys.path.insert(0, 'cleaning/src')
+from context import Context  # noqa: E402
+import render  # noqa: E402
+
+add_arguments = render.add_arguments
+
+
+def main(context):
+    plt = render.pyplot()
+    from tqdm import tqdm
+
+    args = context.options
+
+    # Paths
+    report_path = 'cleaning/asset/top_terms_by_category_year.csv'
+    asset_dir = 'visualization/asset'
+    os.makedirs(asset_dir, exist_ok=True)
+
+    focus_categories = ['cs.LG', 'cs.CV']
+    terms_per_year = 5
+
+    # Load data
+    try:
+        df = context.read_csv(report_path, dtype={'year': str})
+    except FileNotFoundError:
+        print(f"Error: {report_path} not found.")
+        sys.exit(1)
+
+    fig, axes = plt.subplots(1, len(focus_categories), figsize=(9 * len(focus_categories), 9), layout='constrained')
+    for ax, cat in zip(axes, tqdm(focus_categories, desc="Plotting top terms")):
+        cat_df = df[df['category'] == cat]
+        # Union of each year's top terms, ordered by overall share
+        top_terms = cat_df[cat_df['rank'] <= terms_per_year]
+        term_order = top_terms.groupby('term')['share'].sum().sort_values(ascending=False).index
+        # Years where a term is outside the report's top terms stay empty (grey)
+        pivot = cat_df.pivot_table(index='term', columns='year', values='share', aggfunc='sum').reindex(term_order) * 100
+        if pivot.empty:
+            ax.set_title(f'{cat}: no data')
+            ax.axis('off')
+            continue
+        cmap = plt.colormaps['viridis'].with_extremes(bad='lightgrey')
+        im = ax.imshow(pivot.values, aspect='auto', cmap=cmap)
+        ax.set_xticks(range(len(pivot.columns)))
+        ax.set_xticklabels(pivot.columns, rotation=45, ha='right')
+        ax.set_yticks(range(len(pivot.index)))
+        ax.set_yticklabels(pivot.index)
+        ax.set_title(f'Top Terms in {cat} by Year (Share of Term Occurrences, %)')
+        ax.set_xlabel('Year')
+        fig.colorbar(im, ax=ax, label='Share of term occurrences (%)')
+    path = render.save(fig, f'{asset_dir}/arxiv_top_terms_by_year', args)
+    print(f"Saved top terms chart to {path}")
+
+
+if __name__ == "__main__":
+    main(Context.from_command_line(__doc__, add_arguments))
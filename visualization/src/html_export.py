@@ -0,0 +1,107 @@
+"""
+Interactive HTML versions of the stacked bar charts (--html).
+
+Each chart is written as one self-contained HTML file that opens without a server or network
+access: the page template stacked_chart.html (a small canvas renderer) with the chart data
+inlined as a compact columnar JSON payload:
+
+- series are int-coded: their names, colors and main-category group codes are listed once, in
+  stacking order, and everything else refers to them by position;
+- x positions are integers (months as year * 12 + month - 1, years, or label indexes), stored
+  as the first one and the deltas between them, which are almost all 1;
+- each series is stored as the position of its first nonzero value and the values from there
+  up to its last nonzero one, as integers (scaled by the payload's scale for fractional counts);
+- series of more than LOD_THRESHOLD months also carry downsampled levels of detail (quarterly
+  and yearly sums). The page draws the finest level that keeps bars at least a few pixels wide,
+  so the full month x subcategory matrix stays responsive zoomed out.
+
+The page switches between counts and percentages, zooms (drag to select, double-click to
+reset), hides or isolates main categories from the legend, and shows values under the cursor.
+"""
+import json
+import os
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stacked_chart.html')
+LOD_THRESHOLD = 120
+LOD_STEPS = {'month': [1, 3, 12], 'year': [1], 'label': [1]}
+
+
+def _positions(index, x_kind):
+    if x_kind == 'month':
+        return [int(m[:4]) * 12 + int(m[5:7]) - 1 for m in map(str, index)]
+    if x_kind == 'year':
+        return [int(y) for y in index]
+    return list(range(len(index)))
+
+
+def _deltas(positions):
+    return {'start': positions[0], 'deltas': [b - a for a, b in zip(positions, positions[1:])]}
+
+
+def _level(values, positions, step, scale):
+    """Level of detail summing values (positions x series) into bins of step positions."""
+    import numpy as np
+    bins = np.asarray(positions) // step
+    keys, inverse = np.unique(bins, return_inverse=True)
+    sums = np.zeros((len(keys), values.shape[1]))
+    np.add.at(sums, inverse, values)
+    scaled = np.rint(sums * scale).astype(np.int64)
+    offsets, series = [], []
+    for column in scaled.T:
+        nonzero = np.flatnonzero(column)
+        if len(nonzero):
+            offsets.append(int(nonzero[0]))
+            series.append(column[nonzero[0]:nonzero[-1] + 1].tolist())
+        else:
+            offsets.append(0)
+            series.append([])
+    return {'step': step, 'x': _deltas((keys * step).tolist()), 'offsets': offsets, 'values': series}
+
+
+def stacked_chart(pivot, colors, groups, group_colors, title, xlabel, ylabel, x_kind, bar_width=0.8, errors=None):
+    """
+    Payload of a stacked bar chart: pivot has one row per x (index: 'YYYY-MM' months, years or
+    labels, per x_kind) and one column per series in stacking order; colors and groups give each
+    series' color and main category, group_colors the legend colors; errors is an optional
+    (lower, upper) pair of error bar lengths on the totals, as from preview.total_errors.
+    """
+    import numpy as np
+    from matplotlib.colors import to_hex
+
+    values = pivot.to_numpy(dtype=float)
+    scale = 1 if np.allclose(values, np.rint(values)) else 100
+    positions = _positions(pivot.index, x_kind)
+    steps = LOD_STEPS[x_kind] if len(positions) > LOD_THRESHOLD else [1]
+    group_names = list(dict.fromkeys(group_colors))
+    payload = {
+        'title': title,
+        'xlabel': xlabel,
+        'ylabel': ylabel,
+        'xKind': x_kind,
+        'barWidth': bar_width,
+        'scale': scale,
+        'groups': group_names,
+        'groupColors': [to_hex(group_colors[g]) for g in group_names],
+        'series': {
+            'names': [str(c) for c in pivot.columns],
+            'colors': [to_hex(c) for c in colors],
+            'groups': [group_names.index(g) if g in group_colors else -1 for g in groups],
+        },
+        'levels': [_level(values, positions, step, scale) for step in steps],
+    }
+    if x_kind == 'label':
+        payload['labels'] = [str(label) for label in pivot.index]
+    if errors is not None:
+        payload['errors'] = [np.rint(np.asarray(e, dtype=float) * scale).astype(np.int64).tolist() for e in errors]
+    return payload
+
+
+def write_html(payload, path):
+    """Write the self-contained page of a payload from stacked_chart."""
+    with open(TEMPLATE_PATH, 'r') as f:
+        template = f.read()
+    # Compact separators, and no '</' that could end the inline script early
+    data = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+    title = payload['title'].replace('&', '&amp;').replace('<', '&lt;')
+    with open(path, 'w') as f:
+        f.write(template.replace('__TITLE__', title).replace('__PAYLOAD__', data))
@@ -0,0 +1,67 @@
+"""
+Shared --preview / --error-bars / --counting / --html options of the visualization scripts.
+
+--preview renders from the sampled estimates in cleaning/asset/preview/ (written by the count
+scripts with --sample) into visualization/asset/preview/, so full-run charts are not replaced.
+--error-bars adds 95% intervals to the bar totals, estimated from the per-unit sample counts.
+--counting primary|fractional renders from the count tables of that counting mode, so
+cross-listed papers are counted once, into a primary/ or fractional/ subdirectory.
+--html also writes the stacked bar charts as interactive, self-contained HTML pages next to the
+PNGs (see html_export.py).
+"""
+import os
+import sys
+
+sys.path.insert(0, 'cleaning/src')
+from context import COUNTINGS, PREVIEW_DIR, counting_path  # noqa: E402
+
+PREVIEW_ASSET_DIR = 'visualization/asset/preview'
+
+
+def add_arguments(parser):
+    parser.add_argument('--preview', action='store_true',
+                        help=f"render the sampled estimates in {PREVIEW_DIR}/ (see the count scripts' --sample)")
+    parser.add_argument('--error-bars', action='store_true', help="with --preview, draw 95%% intervals on bar totals")
+    parser.add_argument('--counting', choices=COUNTINGS, default='full',
+                        help="full: a paper counts in every listed category; primary: only in the first; "
+                             "fractional: 1/n in each of its n categories")
+    parser.add_argument('--html', action='store_true',
+                        help="also write the stacked bar charts as interactive HTML pages (zoom, filter, percentages)")
+
+
+def options(context):
+    """The run's options, after checking that --error-bars comes with --preview."""
+    if context.option('error_bars') and not context.option('preview'):
+        print("Error: --error-bars needs --preview")
+        sys.exit(1)
+    return context.options
+
+
+def input_path(path, args):
+    path = os.path.join(PREVIEW_DIR, os.path.basename(path)) if args.preview else path
+    return counting_path(path, args.counting)
+
+
+def asset_dir(path, args):
+    path = PREVIEW_ASSET_DIR if args.preview else path
+    return path if args.counting == 'full' else os.path.join(path, args.counting)
+
+
+def counting_label(args):
+    """Chart title suffix naming the counting mode (empty for full counts)."""
+    return {'full': '', 'primary': ', primary category only', 'fractional': ', fractional counting'}[args.counting]
+
+
+def total_errors(group_by, index, args):
+    """
+    (lower, upper) error bar lengths of the estimated total per group, aligned with index.
+    group_by maps the per-unit table (month, categories_list, ...) to a Series of group labels.
+    """
+    import pandas as pd
+    from aggregates import COUNT_COLUMNS
+    from sampling import UNITS_PATH, estimate_totals
+
+    units = pd.read_csv(UNITS_PATH)
+    units['group'] = group_by(units)
+    totals = estimate_totals(units, ['group'], COUNT_COLUMNS[args.counting]).set_index('group').reindex(index).fillna(0)
+    return [(totals['count'] - totals['count_low']).to_numpy(), (totals['count_high'] - totals['count']).to_numpy()]